@@ -8,6 +8,7 @@ from pages.drawing_requests import DrawingRequestsPage
 from pages.drawing_issuance import DrawingIssuancePage
 from pages.placeholders import ReturnPage, ReportsPage
 from pages.users_page import UsersPage
+from prefetch import data_store
 import styles
 
 # Page permission mapping: ID -> Page Key
@@ -20,6 +21,18 @@ PAGE_PERMISSIONS = {
     5: "User Management"
 }
 
+# Page key -> page class, used to build pages and to find their prefetch_data()
+PAGE_CLASSES = {
+    "Drawing Requests": DrawingRequestsPage,
+    "Drawing Issuance": DrawingIssuancePage,
+    "Return": ReturnPage,
+    "Reports": ReportsPage,
+    "User Management": UsersPage
+}
+
+# Pages built with (parent, username); the others take only (parent)
+PAGES_WITH_USERNAME = {"Drawing Requests", "Drawing Issuance"}
+
 class MainApp(ttk.Frame):
     def __init__(self, parent, username, permissions, logout_callback):
         ttk.Frame.__init__(self, parent)
@@ -46,9 +59,12 @@ class MainApp(ttk.Frame):
 
     def _show_first_available_page(self):
         """Show the first page the user has permission to access."""
+        # Before any page is built, so none takes a snapshot from a previous login
+        data_store.clear()
         allowed = self._get_allowed_pages()
         if allowed:
             self.show_page(allowed[0])
+            self._prefetch_pages()
         else:
             # No pages allowed - show a message
             no_access_label = tk.Label(
@@ -59,6 +75,16 @@ class MainApp(ttk.Frame):
             )
             no_access_label.pack(expand=True)
 
+    def _prefetch_pages(self):
+        """
+        Starts loading the data of every other permitted page at low priority,
+        so the first visit to a page renders from memory.
+        """
+        for page_key in self._get_allowed_pages():
+            page_class = PAGE_CLASSES.get(page_key)
+            if page_key not in self.pages and hasattr(page_class, 'prefetch_data'):
+                data_store.prefetch(page_class.cache_name, page_class.prefetch_data)
+
     def _build_ui(self):
         # Top Bar
         top_bar = tk.Frame(self, bg=styles.DARK, height=45)
@@ -126,17 +152,12 @@ class MainApp(ttk.Frame):
             self.current_page.pack_forget()
 
         # Get or create page
-        if page_key not in self.pages:
-            if page_key == "Drawing Requests":
-                self.pages[page_key] = DrawingRequestsPage(self.content_frame, self.username)
-            elif page_key == "Drawing Issuance":
-                self.pages[page_key] = DrawingIssuancePage(self.content_frame, self.username)
-            elif page_key == "Return":
-                self.pages[page_key] = ReturnPage(self.content_frame)
-            elif page_key == "Reports":
-                self.pages[page_key] = ReportsPage(self.content_frame)
-            elif page_key == "User Management":
-                self.pages[page_key] = UsersPage(self.content_frame)
+        if page_key not in self.pages and page_key in PAGE_CLASSES:
+            page_class = PAGE_CLASSES[page_key]
+            if page_key in PAGES_WITH_USERNAME:
+                self.pages[page_key] = page_class(self.content_frame, self.username)
+            else:
+                self.pages[page_key] = page_class(self.content_frame)
         
         # Show page first so user sees the layout
         self.current_page = self.pages.get(page_key)
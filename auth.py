@@ -35,7 +35,7 @@ def authenticate(username, password):
             FROM drawing_users 
             WHERE admin_name = %s AND admin_pass = %s
         """
-        result = db.fetch_all(query, (username, password_md5))
+        result = db.fetch_all(query, (username, password_md5), use_cache=False)
         
         # If we get a result, authentication is successful
         if result and len(result) > 0:
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Offline benchmark of the page data path against the SQLite stand-in.
+
+    python bench_db.py [drawings] [users]
+
+Seeds an in-memory database, then times the queries the Drawing Requests and
+User Management pages issue (count + keyset page walk, user list) with the
+query cache disabled, and prints the per-statement report.
+"""
+
+import os
+import sys
+import time
+
+# The global db instance is built on import; keep it off MySQL
+os.environ.setdefault("DMS_DB_BACKEND", "sqlite")
+
+from db_backends import SQLiteBackend
+from db_handler import DBHandler
+
+DRAWINGS_QUERY = """
+    SELECT drawing_no as no,
+           latest_revision as rev,
+           current_status as status
+    FROM drawings_master_bal
+    WHERE current_status = 'Approved'
+"""
+
+def main(argv):
+    drawings = int(argv[1]) if len(argv) > 1 else 100000
+    users = int(argv[2]) if len(argv) > 2 else 200
+
+    backend = SQLiteBackend()
+    handler = DBHandler(backend=backend, cache_size=0, slow_query_ms=None)
+    start = time.perf_counter()
+    backend.seed(drawings=drawings, users=users)
+    print("Seeded {} drawings, {} users in {:.2f}s".format(
+        drawings, users, time.perf_counter() - start))
+
+    # Walk every page of approved drawings, 10 rows at a time
+    start = time.perf_counter()
+    handler.fetch_all("SELECT COUNT(*) AS total FROM drawings_master_bal "
+                      "WHERE current_status = 'Approved'", use_cache=False)
+    pages = rows = 0
+    after = None
+    while True:
+        page, has_more = handler.fetch_page(DRAWINGS_QUERY, "drawing_no", after=after, limit=10)
+        pages += 1
+        rows += len(page)
+        if not has_more:
+            break
+        after = page[-1]['no']
+    elapsed = time.perf_counter() - start
+    print("Keyset walk: {} pages / {} rows in {:.2f}s ({:.0f} pages/s)".format(
+        pages, rows, elapsed, pages / elapsed if elapsed else 0))
+
+    start = time.perf_counter()
+    for _ in range(100):
+        handler.fetch_all("SELECT id, admin_name, department, access_tokens "
+                          "FROM drawing_users ORDER BY id", use_cache=False)
+    elapsed = time.perf_counter() - start
+    print("User list: 100 loads in {:.2f}s ({:.0f} loads/s)".format(
+        elapsed, 100 / elapsed if elapsed else 0))
+
+    print()
+    print(handler.stats.format_report())
+
+if __name__ == "__main__":
+    main(sys.argv)
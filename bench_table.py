@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Render-time benchmark of the table renderers.
+
+    python bench_table.py [repeats]
+
+Needs a display. For 10, 100 and 1000 rows in view it times a full repaint
+(every row shows a different record) of the widget-per-row VirtualTable and
+of CanvasTable, including Tk's own redraw (update_idletasks), and prints the
+mean and worst time per repaint, plus how many times faster the canvas
+repaints than the widgets for each row count.
+"""
+
+import sys
+import time
+import tkinter as tk
+from tkinter import ttk
+
+import styles
+from pages.table import VirtualTable, CanvasTable
+
+HEADERS = ["Drawing ID", "Revision", "Status", "Requested By", "Action"]
+COL_WIDTHS = [150, 80, 100, 200, 120]
+MIN_WIDTHS = [110, 70, 80, 150, 80]
+
+def row_values(d):
+    return [d["no"], d["rev"], d["status"], d["requested_by"]]
+
+def build_actions(frame):
+    btn = ttk.Button(frame, text="Request", style="Action.TButton")
+    btn.pack()
+
+    def bind(d):
+        btn.configure(command=lambda: None)
+    return bind
+
+def make_table(root, kind):
+    if kind == "widgets":
+        return VirtualTable(root, HEADERS, COL_WIDTHS, MIN_WIDTHS, row_values,
+                            build_actions=build_actions)
+    return CanvasTable(root, HEADERS, COL_WIDTHS, MIN_WIDTHS, row_values,
+                       actions=[("Request", "Action", lambda d: None)])
+
+def bench(root, kind, rows, repeats):
+    data = [{"no": "MDI-DRW-{:06d}".format(i), "rev": "A.{}".format(i % 5),
+             "status": "APPROVED", "requested_by": "user{} at 01-01-2025 10:00".format(i % 7)}
+            for i in range(rows * 2)]
+    table = make_table(root, kind)
+    table.pack(expand=True, fill="both")
+    root.update()
+
+    start = time.perf_counter()
+    table.set_visible_rows(rows)
+    table.set_data(data)
+    root.update_idletasks()
+    first_paint = time.perf_counter() - start
+
+    times = []
+    for r in range(repeats):
+        start = time.perf_counter()
+        # Alternate between two disjoint windows so every slot changes
+        table.scroll_to(rows if r % 2 == 0 else 0)
+        root.update_idletasks()
+        times.append(time.perf_counter() - start)
+
+    table.destroy()
+    root.update()
+    return first_paint, sum(times) / len(times), max(times)
+
+def main(argv):
+    repeats = int(argv[1]) if len(argv) > 1 else 20
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        sys.exit("bench_table.py needs a display (e.g. run it under xvfb-run): {}".format(e))
+    root.geometry("900x700")
+    styles.apply_styles()
+
+    print("{:<8} {:>6} {:>14} {:>14} {:>14}".format(
+        "renderer", "rows", "first paint ms", "repaint ms", "worst ms"))
+    speedups = []
+    for rows in (10, 100, 1000):
+        means = {}
+        for kind in ("widgets", "canvas"):
+            first, mean, worst = bench(root, kind, rows, repeats)
+            means[kind] = mean
+            print("{:<8} {:>6} {:>14.1f} {:>14.2f} {:>14.2f}".format(
+                kind, rows, first * 1000, mean * 1000, worst * 1000))
+        speedups.append((rows, means["widgets"] / means["canvas"]))
+    root.destroy()
+
+    print()
+    for rows, speedup in speedups:
+        print("{:>6} rows: canvas repaints {:.1f}x faster than widgets".format(rows, speedup))
+
+if __name__ == "__main__":
+    main(sys.argv)
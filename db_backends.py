@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Database backends used by db_handler.DBHandler.
+
+A backend knows how to open a connection and how to talk to the driver:
+which exceptions it raises, how to get dict and streaming cursors, how to
+check liveness and how to start a transaction. DBHandler only goes through
+this interface, so the app can run against MySQL (production) or SQLite
+(offline development and benchmarking) without other changes.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+
+class MySQLBackend:
+    """The ERP MySQL database, accessed through MySQLdb (mysqlclient)."""
+    name = "mysql"
+
+    # Client error codes meaning the connection itself is gone, not the statement
+    DISCONNECT_ERRORS = (
+        2003,  # CR_CONN_HOST_ERROR
+        2006,  # CR_SERVER_GONE_ERROR ("MySQL server has gone away")
+        2013,  # CR_SERVER_LOST
+        2055,  # CR_SERVER_LOST_EXTENDED
+        4031,  # ER_CLIENT_INTERACTION_TIMEOUT
+    )
+
+    def __init__(self, host="db.dev.erp.mdi", user="erp", password="erpdeveloper",
+                 dbname="mdiacc", connect_timeout=5):
+        # Imported here so the SQLite backend works without mysqlclient installed
+        import MySQLdb
+        import MySQLdb.cursors
+        self.driver = MySQLdb
+        self.Error = MySQLdb.Error
+        self.host = host
+        self.user = user
+        self.password = password
+        self.dbname = dbname
+        self.connect_timeout = connect_timeout
+
+    def connect(self):
+        return self.driver.connect(
+            host=self.host,
+            user=self.user,
+            passwd=self.password,
+            db=self.dbname,
+            charset='utf8',
+            connect_timeout=self.connect_timeout,
+            cursorclass=self.driver.cursors.DictCursor,
+            # Pooled connections must not keep a stale read snapshot open;
+            # multi-statement work goes through DBHandler.transaction()
+            autocommit=True
+        )
+
+    def cursor(self, conn):
+        return conn.cursor()
+
+    def stream_cursor(self, conn):
+        """Server-side cursor: rows stay on the server until fetched."""
+        return conn.cursor(self.driver.cursors.SSDictCursor)
+
+    def is_alive(self, conn):
+        return bool(conn.open)
+
+    def ping(self, conn):
+        conn.ping()
+
+    def begin(self, cursor):
+        cursor.execute("START TRANSACTION")
+
+    def is_disconnect(self, error):
+        """True if an error means the connection is dead and can be replaced."""
+        if isinstance(error, self.driver.InterfaceError):
+            return True
+        if isinstance(error, self.driver.OperationalError) and error.args:
+            return error.args[0] in self.DISCONNECT_ERRORS
+        return False
+
+# ─────────────────────────────────────────────────────────────────
+# SQLite
+# ─────────────────────────────────────────────────────────────────
+
+# Matches quoted strings (left untouched) or a MySQLdb-style placeholder
+_PLACEHOLDER_RE = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")|%\((\w+)\)s|%s|%%""")
+
+def to_qmark(query):
+    """
+    Converts MySQLdb "format"/"pyformat" placeholders to SQLite's:
+    %s -> ?, %(name)s -> :name and %% -> %. Quoted literals are left as is.
+    """
+    def repl(m):
+        if m.group(1):
+            return m.group(1)
+        if m.group(2):
+            return ":" + m.group(2)
+        if m.group(0) == "%%":
+            return "%"
+        return "?"
+    return _PLACEHOLDER_RE.sub(repl, query)
+
+def _dict_row(cursor, row):
+    return dict((col[0], row[i]) for i, col in enumerate(cursor.description))
+
+class _SQLiteCursor:
+    """DB-API cursor wrapper that accepts MySQLdb-style %s placeholders."""
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query, params=None):
+        if params is None:
+            params = ()
+        elif not isinstance(params, dict):
+            params = tuple(params)
+        self._cursor.execute(to_qmark(query), params)
+        return self._cursor.rowcount
+
+    def executemany(self, query, seq_params):
+        self._cursor.executemany(to_qmark(query), [
+            p if isinstance(p, dict) else tuple(p) for p in seq_params])
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+class _SQLiteConnection:
+    """Gives an sqlite3 connection the parts of the MySQLdb API that DBHandler uses."""
+    def __init__(self, conn):
+        self._conn = conn
+        self.open = 1
+
+    def cursor(self):
+        return _SQLiteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self):
+        self._conn.execute("SELECT 1")
+
+    def close(self):
+        self.open = 0
+        self._conn.close()
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drawings_master_bal (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    drawing_no TEXT NOT NULL UNIQUE,
+    title TEXT,
+    latest_revision TEXT,
+    current_status TEXT NOT NULL,
+    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_dmb_status_no ON drawings_master_bal (current_status, drawing_no);
+CREATE INDEX IF NOT EXISTS idx_dmb_updated_at ON drawings_master_bal (updated_at);
+-- Mirrors MySQL's ON UPDATE CURRENT_TIMESTAMP
+CREATE TRIGGER IF NOT EXISTS trg_dmb_touch AFTER UPDATE ON drawings_master_bal
+WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE drawings_master_bal SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+CREATE TABLE IF NOT EXISTS drawing_users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    admin_name TEXT NOT NULL UNIQUE,
+    admin_pass TEXT NOT NULL,
+    department TEXT,
+    access_tokens TEXT
+);
+"""
+
+class SQLiteBackend:
+    """
+    In-process stand-in for the ERP database with the drawings_master_bal and
+    drawing_users schemas. The default path is a named shared in-memory
+    database, so every pooled connection sees the same data.
+    """
+    name = "sqlite"
+    Error = sqlite3.Error
+
+    def __init__(self, path="file:dms_bench?mode=memory&cache=shared", create_schema=True):
+        self.path = path
+        self.create_schema = create_schema
+        self._keeper = None   # Keeps a shared in-memory database alive
+        self._lock = threading.Lock()
+
+    def _raw_connect(self):
+        conn = sqlite3.connect(self.path, uri=self.path.startswith("file:"),
+                               check_same_thread=False, isolation_level=None,
+                               timeout=10)
+        conn.row_factory = _dict_row
+        return conn
+
+    def connect(self):
+        with self._lock:
+            if self._keeper is None:
+                self._keeper = self._raw_connect()
+                if self.create_schema:
+                    self._keeper.executescript(SQLITE_SCHEMA)
+        return _SQLiteConnection(self._raw_connect())
+
+    def cursor(self, conn):
+        return conn.cursor()
+
+    def stream_cursor(self, conn):
+        # sqlite3 cursors already step through rows lazily
+        return conn.cursor()
+
+    def is_alive(self, conn):
+        return bool(conn.open)
+
+    def ping(self, conn):
+        conn.ping()
+
+    def begin(self, cursor):
+        cursor.execute("BEGIN")
+
+    def is_disconnect(self, error):
+        return isinstance(error, sqlite3.ProgrammingError) and "closed" in str(error)
+
+    def seed(self, drawings=1000, users=20, approved_ratio=0.8):
+        """Fills the tables with synthetic rows for benchmarking."""
+        import hashlib
+        import json
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN")
+            statuses = ["Approved", "Draft", "Obsolete"]
+            rows = []
+            for i in range(drawings):
+                status = "Approved" if (i % 100) < approved_ratio * 100 else statuses[1 + i % 2]
+                rows.append(("MDI-DRW-{:06d}".format(i), "Drawing {}".format(i),
+                             "ABCDEFGH"[i % 8] + "." + str(i % 5), status))
+            cursor.executemany(
+                "INSERT OR IGNORE INTO drawings_master_bal "
+                "(drawing_no, title, latest_revision, current_status) VALUES (%s, %s, %s, %s)",
+                rows)
+            pwd = hashlib.md5("password".encode('utf-8')).hexdigest()
+            cursor.executemany(
+                "INSERT OR IGNORE INTO drawing_users "
+                "(admin_name, admin_pass, department, access_tokens) VALUES (%s, %s, %s, %s)",
+                [("user{}".format(i), pwd, ["Design", "Stores", "QA"][i % 3],
+                  json.dumps([1, 2, 3, 4, 5] if i == 0 else [1, 2]))
+                 for i in range(users)])
+            conn.commit()
+        finally:
+            conn.close()
+
+def backend_from_env():
+    """
+    Picks the backend from the environment:
+        DMS_DB_BACKEND=sqlite   use SQLiteBackend (DMS_SQLITE_PATH optional)
+        otherwise               use MySQLBackend
+    """
+    if os.environ.get("DMS_DB_BACKEND", "mysql").lower() == "sqlite":
+        path = os.environ.get("DMS_SQLITE_PATH")
+        return SQLiteBackend(path) if path else SQLiteBackend()
+    return MySQLBackend()
@@ -1,94 +1,944 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import MySQLdb
-import MySQLdb.cursors
+import asyncio
+import functools
+import random
+import re
 import sys
 import threading
+import time
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from db_backends import backend_from_env
+from query_stats import QueryStats
+
+class ConnectionUnavailable(Exception):
+    """No database connection could be had for a streaming query."""
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free within the checkout timeout."""
+    pass
+
+class ConnectionPool:
+    """
+    Thread-safe pool of database connections.
+
+    Connections are created lazily up to max_size. Idle connections beyond
+    min_size are closed once they have been unused for idle_timeout seconds,
+    and every checkout runs health_check(conn, idle_seconds) so callers never
+    receive a connection that has already been closed.
+    """
+    def __init__(self, factory, min_size=1, max_size=5, timeout=10,
+                 idle_timeout=300, health_check=None):
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size, 1)
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check or (lambda conn, idle_for: True)
+
+        self._idle = deque()      # (conn, last_used) pairs, most recent on the right
+        self._in_use = set()
+        self._pending = 0         # Connections currently being opened
+        self._retired = set()     # In-use connections to close on release
+        self._cond = threading.Condition(threading.Lock())
+
+        # Statistics
+        self._created = 0
+        self._discarded = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _size(self):
+        return len(self._idle) + len(self._in_use) + self._pending
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._discarded += 1
+
+    def _reap_locked(self, now):
+        """Closes idle connections past idle_timeout, keeping min_size alive."""
+        reaped = []
+        # Oldest idle connections are on the left
+        while self._idle and self._size() > self.min_size:
+            conn, last_used = self._idle[0]
+            if now - last_used < self.idle_timeout:
+                break
+            self._idle.popleft()
+            reaped.append(conn)
+        return reaped
+
+    def acquire(self, timeout=None):
+        """Checks out a healthy connection, waiting up to timeout seconds."""
+        if timeout is None:
+            timeout = self.timeout
+        start = time.time()
+        deadline = start + timeout
+        waited = False
+
+        while True:
+            conn = None
+            idle_for = 0.0
+            create = False
+            with self._cond:
+                while not self._idle and self._size() >= self.max_size:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            "No database connection available after {:.1f}s".format(timeout))
+                    waited = True
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    idle_for = time.time() - last_used
+                    self._in_use.add(conn)
+                else:
+                    self._pending += 1
+                    create = True
+
+            if create:
+                try:
+                    conn = self.factory()
+                except Exception:
+                    with self._cond:
+                        self._pending -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._pending -= 1
+                    self._created += 1
+                    self._in_use.add(conn)
+            elif not self._is_healthy(conn, idle_for):
+                # Drop the dead connection and try again
+                with self._cond:
+                    self._in_use.discard(conn)
+                    self._retired.discard(conn)
+                    self._close_quietly(conn)
+                    self._cond.notify()
+                continue
+
+            wait_time = time.time() - start
+            with self._cond:
+                self._checkouts += 1
+                if waited:
+                    self._waits += 1
+                self._wait_total += wait_time
+                self._wait_max = max(self._wait_max, wait_time)
+            return conn
+
+    def _is_healthy(self, conn, idle_for):
+        try:
+            return bool(self.health_check(conn, idle_for))
+        except Exception:
+            return False
+
+    def release(self, conn, discard=False):
+        """Returns a connection to the pool, or closes it if discard is set."""
+        if conn is None:
+            return
+        with self._cond:
+            if conn not in self._in_use:
+                return
+            self._in_use.discard(conn)
+            now = time.time()
+            if discard or conn in self._retired:
+                self._retired.discard(conn)
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, now))
+            reaped = self._reap_locked(now)
+            for c in reaped:
+                self._close_quietly(c)
+            self._cond.notify()
+
+    def reap_idle(self):
+        """Closes connections that have been idle longer than idle_timeout."""
+        with self._cond:
+            reaped = self._reap_locked(time.time())
+            for c in reaped:
+                self._close_quietly(c)
+            return len(reaped)
+
+    def fill(self):
+        """Opens connections until min_size are available."""
+        while True:
+            with self._cond:
+                if self._size() >= self.min_size:
+                    return
+                self._pending += 1
+            try:
+                conn = self.factory()
+            except Exception:
+                with self._cond:
+                    self._pending -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._pending -= 1
+                self._created += 1
+                self._idle.append((conn, time.time()))
+                self._cond.notify()
+
+    def stats(self):
+        """Returns a snapshot of pool usage for sizing and diagnostics."""
+        with self._cond:
+            checkouts = self._checkouts
+            return {
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'size': self._size(),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'created': self._created,
+                'discarded': self._discarded,
+                'checkouts': checkouts,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'wait_time_total': self._wait_total,
+                'wait_time_avg': self._wait_total / checkouts if checkouts else 0.0,
+                'wait_time_max': self._wait_max,
+            }
+
+    def close_all(self):
+        """Closes idle connections and retires in-use ones once they are released."""
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._close_quietly(conn)
+            self._retired.update(self._in_use)
+            self._cond.notify_all()
+
+_WS_RE = re.compile(r"\s+")
+_READ_TABLES_RE = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)`?(?:\.`?(\w+)`?)?", re.IGNORECASE)
+_WRITE_TABLES_RE = re.compile(
+    r"\b(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE(?:\s+IGNORE)?|DELETE\s+FROM|"
+    r"TRUNCATE(?:\s+TABLE)?)\s+`?(\w+)`?(?:\.`?(\w+)`?)?", re.IGNORECASE)
+# "FROM a, b" joins are not tracked per table, so such queries are not cached
+_COMMA_JOIN_RE = re.compile(r"\bFROM\s+[\w`.]+(?:\s+(?:AS\s+)?\w+)?\s*,", re.IGNORECASE)
+_VOLATILE_RE = re.compile(r"\b(?:NOW|RAND|UUID|CURDATE|CURTIME|SYSDATE|CURRENT_\w+)\b",
+                          re.IGNORECASE)
+
+def normalize_sql(query):
+    """Collapses whitespace so equivalent statements share a cache key."""
+    return _WS_RE.sub(" ", query).strip().rstrip(";")
+
+def _tables(regex, query):
+    return set(
+        (qualified or name).lower()
+        for name, qualified in regex.findall(query)
+    )
+
+def read_tables(query):
+    """Returns the lower-cased table names a SELECT reads from."""
+    return _tables(_READ_TABLES_RE, query)
+
+def write_tables(query):
+    """Returns the lower-cased table names a write statement touches."""
+    return _tables(_WRITE_TABLES_RE, query) | read_tables(query)
+
+class QueryCache:
+    """
+    Thread-safe LRU cache of SELECT results with a TTL.
+
+    Each entry remembers the tables its query read from, so a write to any of
+    those tables evicts exactly the results that depend on it.
+
+    Every invalidation also bumps a per-table version. A reader takes
+    version_token() before running its query and passes it to put(); if a
+    write invalidated any of its tables in the meantime, the result may
+    predate that write and is not cached.
+    """
+    def __init__(self, ttl=30, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, rows, tables)
+        self._by_table = {}            # table -> set of keys
+        self._versions = {}            # table -> invalidation count
+        self._epoch = 0                # Bumped when everything is invalidated
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key_for(self, query, params):
+        """Returns a cache key, or None if the query must not be cached."""
+        sql = normalize_sql(query)
+        if (not sql[:6].upper() == "SELECT" or _VOLATILE_RE.search(sql)
+                or _COMMA_JOIN_RE.search(sql)):
+            return None
+        try:
+            params = tuple(params) if params else ()
+            hash(params)
+        except TypeError:
+            return None
+        return (sql, params)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.time():
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(r) for r in entry[1]]
+
+    def _token_locked(self, tables):
+        return (self._epoch, tuple(self._versions.get(t, 0) for t in sorted(tables)))
+
+    def version_token(self, key):
+        """Versions of the tables key reads from; take it before running the query."""
+        tables = read_tables(key[0])
+        with self._lock:
+            return self._token_locked(tables)
+
+    def put(self, key, rows, token=None):
+        tables = read_tables(key[0])
+        if not tables:
+            return
+        with self._lock:
+            if token is not None and token != self._token_locked(tables):
+                # A write landed while the query ran; rows may be from before it
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.time() + self.ttl, [dict(r) for r in rows], tables)
+            for t in tables:
+                self._by_table.setdefault(t, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for t in entry[2]:
+            keys = self._by_table.get(t)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[t]
+
+    def invalidate(self, tables=None):
+        """Evicts results depending on any of tables, or everything if None."""
+        with self._lock:
+            if tables is None:
+                self._entries.clear()
+                self._by_table.clear()
+                self._epoch += 1
+                return
+            for t in tables:
+                t = t.lower()
+                self._versions[t] = self._versions.get(t, 0) + 1
+                for key in list(self._by_table.get(t, ())):
+                    self._drop(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+class Transaction:
+    """State of an open DBHandler.transaction() block."""
+    def __init__(self, conn):
+        self.conn = conn
+        self.failed = conn is None  # Set when any statement fails; forces a rollback
+        self.committed = False
+        self.tables = set()         # Tables written, invalidated again on commit
 
 class DBHandler:
-    def __init__(self):
-        self.host = "db.dev.erp.mdi"
-        self.user = "erp"
-        self.password = "erpdeveloper"
-        self.dbname = "mdiacc"
-        self.conn = None
+    def __init__(self, backend=None, min_connections=1, max_connections=4, checkout_timeout=10,
+                 idle_timeout=300, cache_ttl=30, cache_size=256, slow_query_ms=500,
+                 ping_interval=30, read_retries=1, connect_retries=2,
+                 retry_base_delay=0.05, retry_max_delay=2.0):
+        # Driver-specific details (MySQL, SQLite...) live in db_backends
+        self.backend = backend or backend_from_env()
+        # A connection used within ping_interval seconds is trusted without a ping
+        self.ping_interval = ping_interval
+        self.read_retries = read_retries
+        self.connect_retries = connect_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._local = threading.local()  # Per-thread open transaction
+        self._executor = None            # Worker threads behind the *_async methods
+        self._executor_lock = threading.Lock()
+        self.cache = QueryCache(ttl=cache_ttl, max_entries=cache_size)
+        self.stats = QueryStats(slow_query_ms=slow_query_ms)
+        self.pool = ConnectionPool(
+            self._connect,
+            min_size=min_connections,
+            max_size=max_connections,
+            timeout=checkout_timeout,
+            idle_timeout=idle_timeout,
+            health_check=self._check_alive
+        )
+
+    def _connect(self):
+        return self.backend.connect()
+
+    def use_backend(self, backend):
+        """Switches to another backend, dropping pooled connections and cached results."""
+        self.pool.close_all()
+        self.cache.invalidate()
+        self.backend = backend
 
     def warm_up(self):
-        """Pre-establishes the database connection in a background thread."""
+        """Pre-establishes the pooled database connections in a background thread."""
         def connect():
             try:
-                self.get_connection()
+                self.pool.fill()
                 print("Database connection warmed up successfully.")
             except Exception as e:
                 print("Failed to warm up database connection: {}".format(e))
-        
+
         thread = threading.Thread(target=connect)
         thread.daemon = True
         thread.start()
 
-    def get_connection(self):
-        """Returns a database connection."""
+    def _check_alive(self, conn, idle_for):
+        """Pool health check: pings only connections idle for ping_interval or more."""
+        if not self.backend.is_alive(conn):
+            return False
+        if idle_for >= self.ping_interval:
+            self.backend.ping(conn)
+        return True
+
+    def _backoff(self, attempt):
+        """Sleeps before retry number attempt (0-based), doubling each time with jitter."""
+        delay = min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt))
+        time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def get_connection(self, timeout=None):
+        """
+        Checks a connection out of the pool, reconnecting with backoff if the
+        server cannot be reached. Callers must hand it back with
+        release_connection().
+        """
+        for attempt in range(self.connect_retries + 1):
+            if attempt:
+                self._backoff(attempt - 1)
+            try:
+                return self.pool.acquire(timeout)
+            except self.backend.Error as e:
+                print("Error connecting to {} database: {}".format(self.backend.name, e))
+            except PoolTimeout as e:
+                # Waiting again would only add to the wait already spent
+                print("Error connecting to {} database: {}".format(self.backend.name, e))
+                return None
+        return None
+
+    def release_connection(self, conn, discard=False):
+        """Returns a connection to the pool. Broken connections are discarded."""
+        if conn is None:
+            return
+        if not discard:
+            try:
+                discard = not self.backend.is_alive(conn)
+            except Exception:
+                discard = True
+        self.pool.release(conn, discard=discard)
+
+    def _close_cursor(self, cursor):
+        if cursor is None:
+            return
         try:
-            if self.conn is None or not self.conn.open:
-                self.conn = MySQLdb.connect(
-                    host=self.host,
-                    user=self.user,
-                    passwd=self.password,
-                    db=self.dbname,
-                    charset='utf8',
-                    cursorclass=MySQLdb.cursors.DictCursor
-                )
-            return self.conn
-        except MySQLdb.Error as e:
-            print("Error connecting to MySQL Database: {}".format(e))
-            return None
+            cursor.close()
+        except self.backend.Error:
+            pass
+
+    def _acquire(self):
+        """Returns (conn, tx): the open transaction's connection, or a pooled one."""
+        tx = getattr(self._local, 'transaction', None)
+        if tx is not None:
+            return tx.conn, tx
+        return self.get_connection(), None
+
+    def _release(self, conn, tx, discard=False):
+        if tx is None:
+            self.release_connection(conn, discard=discard)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups statements into a single commit.
+
+        execute_query/execute_many/fetch_all/fetch_iter calls made on this thread
+        inside the block share one connection and are committed together when
+        it exits; reads inside the block see its uncommitted writes.
+        Any failed statement or exception rolls the whole block back. Nested
+        blocks join the outermost transaction.
+
+        Usage:
+            with db.transaction() as tx:
+                db.execute_query(...)
+                db.execute_many(...)
+            if tx.committed: ...
+        """
+        outer = getattr(self._local, 'transaction', None)
+        if outer is not None:
+            try:
+                yield outer
+            except Exception:
+                outer.failed = True
+                raise
+            return
 
-    def fetch_all(self, query, params=None):
-        """Executes a query and returns all results."""
         conn = self.get_connection()
-        if not conn:
-            return []
-        
-        cursor = conn.cursor()
+        tx = Transaction(conn)
+        if conn:
+            cursor = None
+            try:
+                cursor = self.backend.cursor(conn)
+                self.backend.begin(cursor)
+            except self.backend.Error as e:
+                print("Error starting transaction: {}".format(e))
+                tx.failed = True
+            finally:
+                self._close_cursor(cursor)
+
+        self._local.transaction = tx
         try:
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            return cursor.fetchall()
-        except MySQLdb.Error as e:
-            print("Error executing query: {}".format(e))
-            return []
+            yield tx
+        except Exception:
+            tx.failed = True
+            raise
         finally:
-            cursor.close()
+            self._local.transaction = None
+            if conn:
+                try:
+                    if tx.failed:
+                        conn.rollback()
+                    else:
+                        conn.commit()
+                        tx.committed = True
+                        # Drop anything other threads cached before the commit
+                        if tx.tables:
+                            self.cache.invalidate(tx.tables)
+                except self.backend.Error as e:
+                    print("Error committing transaction: {}".format(e))
+                    try:
+                        conn.rollback()
+                    except self.backend.Error:
+                        pass
+                self.release_connection(conn)
+
+    def _invalidate_for(self, query, tx):
+        tables = write_tables(query)
+        if tx is not None:
+            tx.tables.update(tables)
+        self.cache.invalidate(tables or None)
+
+    def invalidate_cache(self, tables=None):
+        """Drops cached results for the given tables (all tables if None)."""
+        if isinstance(tables, str):
+            tables = [tables]
+        self.cache.invalidate(tables)
+
+    def cache_stats(self):
+        """Returns query cache statistics (entries, hits, misses, evictions)."""
+        return self.cache.stats()
+
+    def query_stats(self):
+        """Returns per-statement timings plus pool and cache statistics."""
+        data = self.stats.snapshot()
+        data['pool'] = self.pool_stats()
+        data['cache'] = self.cache_stats()
+        return data
+
+    def dump_stats(self, path):
+        """Writes query_stats() to a JSON file, e.g. to attach to a bug report."""
+        return self.stats.dump(path, extra={'pool': self.pool_stats(),
+                                            'cache': self.cache_stats()})
+
+    def pool_stats(self):
+        """Returns connection pool statistics (in-use, idle, wait times...)."""
+        return self.pool.stats()
+
+    def fetch_all(self, query, params=None, use_cache=True):
+        """
+        Executes a query and returns all results.
+
+        SELECT results are served from the read-through cache when possible;
+        pass use_cache=False for reads that must hit the database.
+        """
+        tx = getattr(self._local, 'transaction', None)
+        key = self.cache.key_for(query, params) if use_cache and tx is None else None
+        if key is not None:
+            rows = self.cache.get(key)
+            if rows is not None:
+                self.stats.record_cache_hit(query)
+                return rows
+            token = self.cache.version_token(key)
+
+        # Reads are idempotent, so a dropped connection is retried on a fresh
+        # one; inside a transaction the connection cannot be swapped
+        attempts = 1 if tx is not None else self.read_retries + 1
+        for attempt in range(attempts):
+            if attempt:
+                self._backoff(attempt - 1)
+            conn, tx = self._acquire()
+            if not conn:
+                return []
+
+            # Created inside the try, so a failure still hands the connection back
+            cursor = None
+            start = time.perf_counter()
+            discard = False
+            try:
+                cursor = self.backend.cursor(conn)
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                rows = cursor.fetchall()
+                self.stats.record(query, params, time.perf_counter() - start, len(rows))
+                if key is not None:
+                    self.cache.put(key, rows, token)
+                return rows
+            except self.backend.Error as e:
+                self.stats.record(query, params, time.perf_counter() - start, error=True)
+                discard = self.backend.is_disconnect(e)
+                if discard and attempt + 1 < attempts:
+                    print("Lost database connection ({}), retrying query.".format(e))
+                    continue
+                print("Error executing query: {}".format(e))
+                return []
+            finally:
+                self._close_cursor(cursor)
+                self._release(conn, tx, discard)
+        return []
+
+    def fetch_iter(self, query, params=None, batch_size=None, fetch_size=500):
+        """
+        Streams the results of a query using a server-side cursor (SSDictCursor
+        on MySQL).
+
+        Rows are read from the server fetch_size at a time, so memory use stays
+        constant no matter how many rows the query returns. The pooled connection
+        is held until the generator is exhausted or closed. Inside transaction()
+        the query runs on the transaction's connection instead.
+
+        Args:
+            query: The SELECT statement to run.
+            params: Query parameters.
+            batch_size: If set, yield lists of up to batch_size rows instead of
+                        single rows.
+            fetch_size: Rows requested from the server per round trip.
+
+        Yields:
+            dict rows, or lists of dict rows when batch_size is given.
+
+        Raises:
+            ConnectionUnavailable: No connection could be had.
+            backend.Error: The query failed, possibly part-way through the
+                           stream. A stream that ends without raising is
+                           complete.
+        """
+        # A dropped connection is retried only before the first row is handed
+        # out; after that the caller has already consumed part of the stream.
+        # Inside a transaction the connection cannot be swapped.
+        tx = getattr(self._local, 'transaction', None)
+        attempts = 1 if tx is not None else self.read_retries + 1
+        for attempt in range(attempts):
+            if attempt:
+                self._backoff(attempt - 1)
+            conn, tx = self._acquire()
+            if not conn:
+                raise ConnectionUnavailable("No database connection available")
+
+            cursor = None
+            # Only time spent inside the driver is counted, not the consumer's work
+            elapsed = 0.0
+            count = 0
+            error = None
+            try:
+                cursor = self.backend.stream_cursor(conn)
+                start = time.perf_counter()
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                elapsed += time.perf_counter() - start
+
+                chunk = batch_size or fetch_size
+                while True:
+                    start = time.perf_counter()
+                    rows = cursor.fetchmany(chunk)
+                    elapsed += time.perf_counter() - start
+                    if not rows:
+                        break
+                    count += len(rows)
+                    if batch_size:
+                        yield list(rows)
+                    else:
+                        for row in rows:
+                            yield row
+            except self.backend.Error as e:
+                error = e
+            finally:
+                self.stats.record(query, params, elapsed, count, error=error is not None)
+                self._close_cursor(cursor)
+                self._release(conn, tx,
+                              discard=error is not None and self.backend.is_disconnect(error))
+
+            if error is None:
+                return
+            if self.backend.is_disconnect(error) and count == 0 and attempt + 1 < attempts:
+                print("Lost database connection ({}), retrying query.".format(error))
+                continue
+            print("Error executing query: {}".format(error))
+            # Ending quietly would look like a complete (if short) result
+            raise error
+
+    def fetch_page(self, query, order_key, after=None, before=None, limit=50,
+                   params=None):
+        """
+        Keyset (seek) pagination on an indexed, unique column.
+
+        Instead of OFFSET, the page boundary is expressed as a range predicate on
+        order_key, so every page costs one index range scan regardless of depth.
+
+        Args:
+            query: A plain "SELECT ... FROM ... [WHERE ...]" without ORDER BY,
+                   GROUP BY or LIMIT; the range predicate is appended to it.
+            order_key: Column to seek on, e.g. "drawing_no".
+            after: Return rows whose key is greater than this (next page).
+            before: Return rows whose key is less than this (previous page).
+            limit: Page size.
+            params: Parameters for the placeholders already in query.
+
+        Returns:
+            tuple: (rows, has_more)
+                - rows: At most limit rows in ascending key order
+                - has_more: True if more rows exist in the direction of travel
+        """
+        sql = query.strip().rstrip(";")
+        if re.search(r"\b(ORDER\s+BY|GROUP\s+BY|LIMIT)\b", sql, re.IGNORECASE):
+            raise ValueError("fetch_page query must not contain ORDER BY, GROUP BY or LIMIT")
+
+        params = list(params or [])
+        backward = before is not None
+        if backward:
+            cursor_value, op, direction = before, "<", "DESC"
+        else:
+            cursor_value, op, direction = after, ">", "ASC"
+
+        if cursor_value is not None:
+            predicate = "{} {} %s".format(order_key, op)
+            match = re.search(r"\bWHERE\b", sql, re.IGNORECASE)
+            if match:
+                sql = "{} WHERE ({}) AND {}".format(
+                    sql[:match.start()].rstrip(), sql[match.end():].strip(), predicate)
+            else:
+                sql = "{} WHERE {}".format(sql, predicate)
+            params.append(cursor_value)
+
+        # Fetch one extra row to learn whether another page exists
+        sql = "{} ORDER BY {} {} LIMIT %s".format(sql, order_key, direction)
+        params.append(limit + 1)
+
+        rows = list(self.fetch_all(sql, tuple(params)))
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backward:
+            rows.reverse()
+        return (rows, has_more)
 
     def execute_query(self, query, params=None):
-        """Executes a query (INSERT, UPDATE, DELETE)."""
-        conn = self.get_connection()
-        if not conn:
+        """
+        Executes a query (INSERT, UPDATE, DELETE).
+        Inside transaction() the statement is committed with the block.
+        """
+        conn, tx = self._acquire()
+        if not conn or (tx is not None and tx.failed):
             return False
         
-        cursor = conn.cursor()
+        cursor = None
+        start = time.perf_counter()
+        discard = False
         try:
+            cursor = self.backend.cursor(conn)
             if params:
                 cursor.execute(query, params)
             else:
                 cursor.execute(query)
-            conn.commit()
+            if tx is None:
+                conn.commit()
+            self.stats.record(query, params, time.perf_counter() - start, cursor.rowcount)
+            self._invalidate_for(query, tx)
             return True
-        except MySQLdb.Error as e:
+        except self.backend.Error as e:
+            self.stats.record(query, params, time.perf_counter() - start, error=True)
             print("Error executing query: {}".format(e))
-            conn.rollback()
+            discard = self.backend.is_disconnect(e)
+            if tx is not None:
+                tx.failed = True
+            elif not discard:
+                try:
+                    conn.rollback()
+                except self.backend.Error:
+                    pass
             return False
         finally:
-            cursor.close()
+            self._close_cursor(cursor)
+            self._release(conn, tx, discard)
+
+    def execute_many(self, query, seq_params):
+        """
+        Executes one statement for every parameter tuple in a single round trip.
+
+        For INSERT/REPLACE ... VALUES (%s, ...) MySQLdb rewrites the batch into
+        multi-row VALUES statements, so importing N rows costs a constant number
+        of round trips and one commit instead of N.
+        """
+        seq_params = list(seq_params)
+        if not seq_params:
+            return True
+
+        conn, tx = self._acquire()
+        if not conn or (tx is not None and tx.failed):
+            return False
+
+        cursor = None
+        start = time.perf_counter()
+        discard = False
+        try:
+            cursor = self.backend.cursor(conn)
+            cursor.executemany(query, seq_params)
+            if tx is None:
+                conn.commit()
+            self.stats.record(query, "<{} rows>".format(len(seq_params)),
+                              time.perf_counter() - start, cursor.rowcount)
+            self._invalidate_for(query, tx)
+            return True
+        except self.backend.Error as e:
+            self.stats.record(query, "<{} rows>".format(len(seq_params)),
+                              time.perf_counter() - start, error=True)
+            print("Error executing batch: {}".format(e))
+            discard = self.backend.is_disconnect(e)
+            if tx is not None:
+                tx.failed = True
+            elif not discard:
+                try:
+                    conn.rollback()
+                except self.backend.Error:
+                    pass
+            return False
+        finally:
+            self._close_cursor(cursor)
+            self._release(conn, tx, discard)
+
+    # ─────────────────────────────────────────────────────────────────
+    # asyncio facade
+    # ─────────────────────────────────────────────────────────────────
+
+    def _get_executor(self):
+        # One worker per pooled connection. The pool is shared with the
+        # TaskScheduler's workers, so this does not guarantee a free
+        # connection: an async call can still wait up to checkout_timeout
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.pool.max_size)
+            return self._executor
+
+    def run_async(self, func, *args, **kwargs):
+        """
+        Runs a blocking DBHandler call on the bounded executor and returns an
+        awaitable. Pass timeout=<seconds> to raise asyncio.TimeoutError.
+
+        Cancelling the awaitable drops a call that has not started yet; a
+        query already running finishes in its worker and its result is
+        discarded.
+
+        The call gets no connection of its own: it checks one out of the
+        pool shared with the background TaskScheduler. If none frees up
+        within checkout_timeout it behaves like the blocking call, so
+        fetch_all resolves to [] and execute_query to False; pass a timeout
+        shorter than checkout_timeout to get asyncio.TimeoutError instead.
+
+        Must be called from code running on an event loop (e.g. inside a
+        coroutine); without one it raises RuntimeError.
+        """
+        timeout = kwargs.pop('timeout', None)
+        loop = asyncio.get_running_loop()
+        fut = loop.run_in_executor(self._get_executor(),
+                                   functools.partial(func, *args, **kwargs))
+        if timeout is not None:
+            return asyncio.wait_for(fut, timeout)
+        return fut
+
+    def fetch_all_async(self, query, params=None, use_cache=True, timeout=None):
+        """Awaitable fetch_all()."""
+        return self.run_async(self.fetch_all, query, params, use_cache, timeout=timeout)
+
+    def fetch_page_async(self, query, order_key, after=None, before=None, limit=50,
+                         params=None, timeout=None):
+        """Awaitable fetch_page()."""
+        return self.run_async(self.fetch_page, query, order_key, after, before, limit,
+                              params, timeout=timeout)
+
+    def execute_query_async(self, query, params=None, timeout=None):
+        """Awaitable execute_query()."""
+        return self.run_async(self.execute_query, query, params, timeout=timeout)
+
+    def execute_many_async(self, query, seq_params, timeout=None):
+        """Awaitable execute_many()."""
+        return self.run_async(self.execute_many, query, list(seq_params), timeout=timeout)
+
+    def gather_async(self, *awaitables, **kwargs):
+        """
+        Runs several awaitables concurrently and returns their results in order.
+
+        If any of them fails, the others are cancelled and the error is raised.
+        Pass timeout=<seconds> to bound the whole fan-out.
+
+        Usage:
+            profile, perms, first_page = await db.gather_async(
+                db.fetch_all_async(profile_sql, (uid,)),
+                db.fetch_all_async(perms_sql, (uid,)),
+                db.fetch_page_async(drawings_sql, "drawing_no", limit=10),
+                timeout=5)
+        """
+        timeout = kwargs.pop('timeout', None)
+        futures = [asyncio.ensure_future(a) for a in awaitables]
+
+        def cancel_rest(done):
+            if not done.cancelled() and done.exception() is not None:
+                for f in futures:
+                    f.cancel()
+
+        for f in futures:
+            f.add_done_callback(cancel_rest)
+
+        gathered = asyncio.gather(*futures)
+        if timeout is not None:
+            return asyncio.wait_for(gathered, timeout)
+        return gathered
 
     def close(self):
-        """Closes the connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        """Closes all pooled connections."""
+        self.pool.close_all()
 
 # Global instance for easy access
 db = DBHandler()
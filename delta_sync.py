@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+
+class SyncError(Exception):
+    """A full load did not return the number of rows the server counted."""
+
+class DeltaSync:
+    """
+    Keeps an in-memory copy of a filtered table up to date incrementally.
+
+    The first sync streams the full result set and records a high-water mark,
+    the largest value of version_column seen (e.g. an updated_at timestamp).
+    Later syncs fetch only rows whose version is at or above the mark and
+    merge them by key: rows that still match keep(row) are inserted or updated
+    in place, and rows that no longer match (e.g. a status change away from
+    'Approved') are removed. Hard deletes leave no version trail, so when the
+    server-side count disagrees with the local copy a full reload is done.
+
+    If the table has no usable version column, every sync is a full reload.
+    """
+    def __init__(self, db, table, columns, key, where, keep,
+                 version_column="updated_at", where_params=()):
+        self.db = db
+        self.table = table
+        self.columns = columns
+        self.key = key
+        self.where = where
+        self.where_params = tuple(where_params)
+        self.keep = keep
+        self.version_column = version_column
+
+        self.rows = {}              # key -> row dict, updated in place
+        self.high_water_mark = None
+        self.supports_delta = None  # Whether version_column can be queried
+        # What the last sync() did: None after a full load, otherwise
+        # {'upserted': [row, ...], 'removed': [row, ...]} for a delta
+        self.last_changes = None
+        self._sorted = None         # Cached sorted_rows() result
+        self._lock = threading.Lock()
+
+    def _select(self):
+        return "SELECT {}, {} AS _version FROM {}".format(
+            self.columns, self.version_column, self.table)
+
+    def _probe(self):
+        try:
+            list(self.db.fetch_iter(
+                "SELECT MAX({}) AS hwm FROM {}".format(self.version_column, self.table)))
+        except self.db.backend.Error as e:
+            # A lost connection says nothing about the table; anything else
+            # (e.g. the column is missing) will not change, so stop asking
+            if not self.db.backend.is_disconnect(e):
+                self.supports_delta = False
+            return
+        except Exception:
+            return   # e.g. no connection at all; probed again on the next sync
+        self.supports_delta = True
+
+    def reset(self):
+        with self._lock:
+            self.rows = {}
+            self.high_water_mark = None
+            self._sorted = None
+
+    def load_snapshot(self, rows, high_water_mark):
+        """Seeds the local copy from a previously saved state (e.g. a disk cache)."""
+        with self._lock:
+            self.rows = dict((r[self.key], r) for r in rows)
+            self.high_water_mark = high_water_mark
+            self._sorted = None
+
+    def _track(self, row):
+        version = row.pop('_version', None)
+        if version is not None and (self.high_water_mark is None or version > self.high_water_mark):
+            self.high_water_mark = version
+
+    def _full_load(self, expected_count=None):
+        """
+        Replaces the local copy with a fresh result set. Nothing is changed
+        unless the stream finished cleanly (fetch_iter raises otherwise) and,
+        when expected_count is given, returned that many rows.
+        """
+        if self.supports_delta:
+            query = "{} WHERE {}".format(self._select(), self.where)
+        else:
+            query = "SELECT {} FROM {} WHERE {}".format(self.columns, self.table, self.where)
+
+        rows = {}
+        high_water_mark = None
+        for row in self.db.fetch_iter(query, self.where_params or None):
+            version = row.pop('_version', None)
+            if version is not None and (high_water_mark is None or version > high_water_mark):
+                high_water_mark = version
+            rows[row[self.key]] = row
+        if expected_count is not None and expected_count != len(rows):
+            raise SyncError("{}: expected {} rows, loaded {}".format(
+                self.table, expected_count, len(rows)))
+
+        old = self.rows
+        for key, row in rows.items():
+            existing = old.get(key)
+            if existing is not None:
+                # Keep the same dict so client-side annotations survive
+                existing.update(row)
+                rows[key] = existing
+        self.rows = rows
+        self.high_water_mark = high_water_mark
+
+    def _checked_full_load(self, expected_count):
+        try:
+            self._full_load(expected_count)
+        except SyncError:
+            # Rows may have been added or removed between the count and the
+            # stream; a second mismatch is passed on to the caller
+            self._full_load(expected_count)
+
+    def _delta_load(self):
+        query = "{} WHERE {} >= %s".format(self._select(), self.version_column)
+        changed = self.db.fetch_all(query, (self.high_water_mark,), use_cache=False)
+        upserted = []
+        removed = []
+        for row in changed:
+            self._track(row)
+            key = row[self.key]
+            existing = self.rows.get(key)
+            if not self.keep(row):
+                if existing is not None:
+                    removed.append(self.rows.pop(key))
+            elif existing is not None:
+                if any(existing.get(k) != v for k, v in row.items()):
+                    existing.update(row)
+                    upserted.append(existing)
+            else:
+                self.rows[key] = row
+                upserted.append(row)
+        self.last_changes = {'upserted': upserted, 'removed': removed}
+        return len(upserted) + len(removed)
+
+    def sync(self, expected_count=None):
+        """
+        Brings the local copy up to date.
+
+        Args:
+            expected_count: Server-side row count of the dataset, if known; a
+                            mismatch after merging forces a full reload, and
+                            a full reload must return that many rows.
+
+        Raises:
+            The database error that ended a full load part-way, or SyncError
+            if a full load twice returned a different number of rows. A failed
+            full load leaves the local copy and high-water mark untouched.
+
+        Returns:
+            tuple: (rows, changed)
+                - rows: All rows sorted by key
+                - changed: False if nothing changed since the last sync
+        """
+        with self._lock:
+            if self.supports_delta is None:
+                # Re-probed only while failures were connection problems
+                self._probe()
+
+            changed = True
+            if self.supports_delta and self.high_water_mark is not None:
+                changed = self._delta_load() > 0
+                if expected_count is not None and expected_count != len(self.rows):
+                    self._checked_full_load(expected_count)
+                    self.last_changes = None
+                    changed = True
+            else:
+                self._checked_full_load(expected_count)
+                self.last_changes = None
+
+            if changed:
+                self._sorted = None
+            return self.sorted_rows(), changed
+
+    def sorted_rows(self):
+        """All rows sorted by key; the same list is returned until something changes."""
+        if self._sorted is None:
+            self._sorted = [self.rows[k] for k in sorted(self.rows)]
+        return self._sorted
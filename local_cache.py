@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import decimal
+import json
+import os
+import sqlite3
+import time
+
+_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+_DATE_FORMAT = "%Y-%m-%d"
+
+def _encode_value(value):
+    """JSON-safe form of a DB value that keeps enough type info to restore it."""
+    if isinstance(value, datetime.datetime):
+        return {"$datetime": value.strftime(_DATETIME_FORMAT)}
+    if isinstance(value, datetime.date):
+        return {"$date": value.strftime(_DATE_FORMAT)}
+    if isinstance(value, decimal.Decimal):
+        return {"$decimal": str(value)}
+    return value
+
+def _decode_value(value):
+    if isinstance(value, dict) and len(value) == 1:
+        if "$datetime" in value:
+            return datetime.datetime.strptime(value["$datetime"], _DATETIME_FORMAT)
+        if "$date" in value:
+            return datetime.datetime.strptime(value["$date"], _DATE_FORMAT).date()
+        if "$decimal" in value:
+            return decimal.Decimal(value["$decimal"])
+    return value
+
+def _encode_row(row):
+    return dict((k, _encode_value(v)) for k, v in row.items())
+
+def _decode_row(row):
+    return dict((k, _decode_value(v)) for k, v in row.items())
+
+class LocalCache:
+    """
+    On-disk cache of the last-known page datasets (drawings, users...).
+
+    Pages paint from it on open and reconcile against the database in the
+    background. Every row is stored on its own, keyed by (dataset, key), so
+    a delta sync writes only the rows it changed. The file is opened in WAL
+    mode so several app instances on the same PC can read while another one
+    writes. Every call opens its own short-lived connection, so it is safe
+    from any thread. Errors are printed and treated as a cache miss; the
+    cache never blocks the app from working.
+    """
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("DMS_CACHE_PATH") or os.path.join(
+            os.path.expanduser("~"), ".dms_cache.sqlite3")
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Earlier versions kept each dataset as a single JSON blob
+            conn.execute("DROP TABLE IF EXISTS datasets")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dataset_info (
+                    name TEXT PRIMARY KEY,
+                    synced_at REAL NOT NULL,
+                    high_water_mark TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dataset_rows (
+                    name TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    row TEXT NOT NULL,
+                    PRIMARY KEY (name, key)
+                )
+            """)
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    @staticmethod
+    def _row_items(rows, key, exclude):
+        for r in rows:
+            yield (json.dumps(_encode_value(r[key])),
+                   json.dumps(_encode_row(dict((k, v) for k, v in r.items() if k not in exclude))))
+
+    def save(self, name, rows, key, high_water_mark=None, exclude=()):
+        """
+        Stores rows for a dataset, replacing the previous copy.
+
+        Args:
+            name: Dataset name, e.g. "drawing_requests".
+            rows: List of row dicts.
+            key: Column that identifies a row, e.g. "no".
+            high_water_mark: Delta-sync mark to resume from on the next run.
+            exclude: Keys left out of every row (client-side annotations).
+        """
+        try:
+            mark = json.dumps(_encode_value(high_water_mark))
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM dataset_rows WHERE name = ?", (name,))
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO dataset_rows (name, key, row) VALUES (?, ?, ?)",
+                        ((name, k, r) for k, r in self._row_items(rows, key, exclude)))
+                    conn.execute(
+                        "INSERT OR REPLACE INTO dataset_info (name, synced_at, high_water_mark) "
+                        "VALUES (?, ?, ?)", (name, time.time(), mark))
+            finally:
+                conn.close()
+            return True
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print("Error writing local cache: {}".format(e))
+            return False
+
+    def apply_changes(self, name, upserted, removed, key, high_water_mark=None, exclude=()):
+        """
+        Writes a delta sync to a dataset saved earlier: upserted rows are
+        inserted or replaced and removed rows deleted; nothing else is touched.
+
+        Returns:
+            bool: False if the dataset was never saved (call save() instead)
+                  or the cache could not be written.
+        """
+        try:
+            mark = json.dumps(_encode_value(high_water_mark))
+            conn = self._connect()
+            try:
+                with conn:
+                    updated = conn.execute(
+                        "UPDATE dataset_info SET synced_at = ?, high_water_mark = ? WHERE name = ?",
+                        (time.time(), mark, name)).rowcount
+                    if not updated:
+                        return False
+                    conn.executemany(
+                        "DELETE FROM dataset_rows WHERE name = ? AND key = ?",
+                        ((name, json.dumps(_encode_value(r[key]))) for r in removed))
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO dataset_rows (name, key, row) VALUES (?, ?, ?)",
+                        ((name, k, r) for k, r in self._row_items(upserted, key, exclude)))
+            finally:
+                conn.close()
+            return True
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print("Error writing local cache: {}".format(e))
+            return False
+
+    def load(self, name):
+        """
+        Returns (rows, high_water_mark, synced_at) for a dataset, or None if
+        it has never been saved or the cache cannot be read. Rows come back
+        in the order they were written. Decoding a large dataset takes a
+        while; pages call this on a worker.
+        """
+        try:
+            conn = self._connect()
+            try:
+                info = conn.execute(
+                    "SELECT synced_at, high_water_mark FROM dataset_info WHERE name = ?",
+                    (name,)).fetchone()
+                if info is None:
+                    return None
+                payloads = conn.execute(
+                    "SELECT row FROM dataset_rows WHERE name = ? ORDER BY rowid",
+                    (name,)).fetchall()
+            finally:
+                conn.close()
+            synced_at, mark = info
+            rows = [_decode_row(json.loads(p)) for p, in payloads]
+            return (rows, _decode_value(json.loads(mark)) if mark else None, synced_at)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print("Error reading local cache: {}".format(e))
+            return None
+
+    def clear(self, name=None):
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    if name is None:
+                        conn.execute("DELETE FROM dataset_info")
+                        conn.execute("DELETE FROM dataset_rows")
+                    else:
+                        conn.execute("DELETE FROM dataset_info WHERE name = ?", (name,))
+                        conn.execute("DELETE FROM dataset_rows WHERE name = ?", (name,))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print("Error clearing local cache: {}".format(e))
+
+def format_synced(synced_at):
+    """Short "last synced" text for page footers."""
+    if not synced_at:
+        return ""
+    stamp = datetime.datetime.fromtimestamp(synced_at)
+    if stamp.date() == datetime.date.today():
+        return "Last synced {}".format(stamp.strftime("%H:%M:%S"))
+    return "Last synced {}".format(stamp.strftime("%d-%m-%Y %H:%M"))
+
+# Global instance for easy access
+local_cache = LocalCache()
@@ -6,8 +6,9 @@ from tkinter import ttk
 from tkinter import messagebox
 import styles
 import auth
-import threading
 from app import MainApp
+from scheduler import scheduler
+from prefetch import data_store
 
 class LoginFrame(tk.Frame):
     def __init__(self, parent, on_login_success):
@@ -70,15 +71,10 @@ class LoginFrame(tk.Frame):
         self.root = self.winfo_toplevel()
         self.root.config(cursor="watch")
         
-        # Start background thread
-        thread = threading.Thread(target=self._auth_thread, args=(username, password))
-        thread.daemon = True
-        thread.start()
-
-    def _auth_thread(self, username, password):
-        success, permissions = auth.authenticate(username, password)
-        # Schedule update on main thread
-        self.after(0, lambda: self._on_auth_complete(success, permissions, username))
+        # Authenticate on the shared worker pool; a second Enter while the
+        # first attempt is in flight joins it instead of starting another
+        scheduler.submit("login", auth.authenticate, (username, password),
+                         callback=lambda result: self._on_auth_complete(result[0], result[1], username))
 
     def _on_auth_complete(self, success, permissions, username):
         # Reset UI state
@@ -107,6 +103,9 @@ class DrawingSystemApp:
         
         styles.apply_styles()
         
+        # Deliver background task results on the Tk main loop
+        scheduler.attach(self.root)
+        
         # Warm up database connection in background
         from db_handler import db
         db.warm_up()
@@ -127,6 +126,8 @@ class DrawingSystemApp:
     def logout(self):
         if self.main_app:
             self.main_app.pack_forget()
+        # Don't keep this user's prefetched data around for the next login
+        data_store.clear()
         self.login_frame.reset()
         self.login_frame.pack(expand=True, fill="both")
 
@@ -5,7 +5,14 @@ import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
 import datetime
-import threading
+import time
+from scheduler import scheduler, SingleFlight, TaskScheduler
+from delta_sync import DeltaSync
+from local_cache import local_cache, format_synced
+from pages.table import CanvasTable
+from search import SearchController, TrigramIndex, SEARCH_KEY, search_text, search_key, matches_key
+from sorting import SortIndex, TableSorter, sort_value
+from prefetch import data_store
 
 # Assuming you have a styles module - if not, you can replace with plain values
 # For compatibility we're using more basic colors where possible
@@ -19,82 +26,319 @@ except ImportError:
     styles = DummyStyles()
 
 class DrawingRequestsPage(ttk.Frame):
+    # Name of the dataset in the local cache and the prefetch store
+    cache_name = "drawing_requests"
+
+    # Up to local_limit approved drawings are kept in memory and kept
+    # current with delta syncs; beyond that rows are loaded in keyset
+    # batches as the table is scrolled towards the end, and searches run
+    # on the server as a drawing number prefix match
+    local_limit = 50000
+
     def __init__(self, parent, username="User"):
         ttk.Frame.__init__(self, parent, style="Card.TFrame", padding=25)
         self.pack(expand=True, fill="both", padx=20, pady=20)
         
         self.username = username
-        self.drawings = []
-        self.page_size = 10
-        self.current_page = 0
+        self.drawings = []      # All approved drawings, or the batches loaded so far in server mode
         self.filtered = []
+        self.total_records = 0
+        self.has_next = False
+        self.fetch_size = 200   # Rows per keyset query in server mode
+        
+        self.server_mode = False
+        self._server_query = ""
+        self._sync = self._new_sync()
+        self._reading_cache = True   # The cached copy is being loaded into _sync
         
-        # Column configuration: [Drawing ID, Revision, Status, Requested By, Action]
-        self.col_widths = [150, 80, 100, 200, 120]
-        self.row_widgets = []  # Cache for row widgets
-        self.is_loading = False # Flag to prevent redundant fetches
+        # Coalesces overlapping loads: one in flight, at most one trailing
+        self._loader = SingleFlight(scheduler, "drawing_requests.load",
+                                    self._fetch_data, self._on_data_ready)
+        # Trigram index over the loaded drawings; built and kept current by the loader
+        self._index = None
+        # Waits for a pause in typing; big datasets are filtered off the main thread
+        self._search = SearchController(self, matches_key, self._on_search_results,
+                                        delay=200, threshold=5000)
+        # Click-to-sort; its SortIndex is built and kept current next to the trigram index
+        self._sorter = TableSorter()
         
         self._build_ui()
         
-        # Start loading data after UI is built
-        self.after(100, self._start_loading)
+        # Paint the last-known data as soon as it is decoded, then reconcile
+        self._paint_from_cache()
+
+    def _paint_from_cache(self):
+        # Loaded in the background right after login, if this page was not
+        # the first; a prefetch still running is waited for, not repeated
+        data_store.take(self.cache_name, self._on_prefetched)
+
+    def _on_prefetched(self, prefetched):
+        # The loader starts from the callbacks, so it never syncs _sync
+        # while the cached copy is still being loaded into it
+        scheduler.submit(("drawing_requests.cache", id(self)), self._read_cache, (prefetched,),
+                         callback=self._on_cache_ready, errback=self._on_cache_failed,
+                         priority=TaskScheduler.HIGH)
+
+    def _read_cache(self, prefetched):
+        """Runs on a worker: seeds _sync from the prefetched snapshot or the disk cache."""
+        cached = prefetched or local_cache.load(self.cache_name)
+        if not cached:
+            return None
+        rows, high_water_mark, synced_at = cached
+        self._sync.load_snapshot(rows, high_water_mark)
+        drawings = self._sync.sorted_rows()
+        if prefetched:
+            return drawings, format_synced(synced_at)
+        for item in drawings:
+            item['requested_by'] = ""
+            self._set_search_key(item)
+        return drawings, format_synced(synced_at) + " (cached)"
+
+    def _on_cache_ready(self, cached):
+        self._reading_cache = False
+        if cached is not None:
+            self.drawings, synced = cached
+            self.sync_label.config(text=synced)
+            self._search_data()
+        self._start_loading()
+
+    def _on_cache_failed(self, error):
+        self._reading_cache = False
+        print("Error reading cached drawings: {}".format(error))
+        self._start_loading()
 
-    def _start_loading(self):
-        if self.is_loading:
+    @classmethod
+    def _new_sync(cls):
+        return DeltaSync(
+            cls._get_db(), "drawings_master_bal",
+            "drawing_no AS no, latest_revision AS rev, current_status AS status",
+            key="no", where="current_status = 'Approved'",
+            keep=lambda row: row.get("status") == "Approved")
+
+    @classmethod
+    def prefetch_data(cls):
+        """
+        Loads all approved drawings for data_store, on a worker right after
+        login. Returns (rows, high_water_mark), or None when the dataset is
+        too large to keep in memory or the database is unreachable.
+        """
+        total = cls._count_data()
+        if total is None or total > cls.local_limit:
+            return None
+        sync = cls._new_sync()
+        data, _ = sync.sync(expected_count=total)
+        for item in data:
+            item['requested_by'] = ""
+            cls._set_search_key(item)
+        local_cache.save(cls.cache_name, data, sync.key, sync.high_water_mark,
+                         exclude=('requested_by', SEARCH_KEY))
+        return data, sync.high_water_mark
+
+    def _start_loading(self, after=None):
+        if self._reading_cache:
+            # _on_cache_ready starts the first load
+            return
+        if after is None:
+            self.loading_label.place(relx=0.5, rely=0.5, anchor="center")
+        self._loader.request(after, self._server_query)
+
+    def _fetch_data(self, after, query):
+        fresh = after is None
+        # Only count on a fresh load; loading more rows keeps the known total
+        total = self._count_data(query) if fresh else None
+        if fresh and total is None:
+            # Database unreachable: keep whatever is on screen
+            return {'failed': True}
+        if not query and total is not None and total <= self.local_limit:
+            try:
+                data, changed = self._sync.sync(expected_count=total)
+            except Exception as e:
+                print("Error syncing data: {}".format(e))
+                return {'failed': True}
+            changes = self._sync.last_changes
+            # Search keys are computed here, off the main thread, and only for
+            # the rows a delta touched
+            for item in (data if changes is None else changes['upserted']):
+                item.setdefault('requested_by', "")
+                self._set_search_key(item)
+            index = sort_index = None
+            if changed or self._index is None:
+                index, sort_index = self._update_indexes(data)
+            if changed:
+                self._save_changes(data, changes)
+            return {'local': True, 'data': data, 'changed': changed, 'total': total,
+                    'synced_at': time.time(), 'index': index, 'sort_index': sort_index}
+        data, has_more = self._generate_data(after, query)
+        return {'local': False, 'data': data, 'has_more': has_more,
+                'append': not fresh, 'total': total, 'query': query}
+
+    def _save_changes(self, data, changes):
+        """Runs on the loader thread; a delta rewrites only the rows it touched."""
+        sync = self._sync
+        exclude = ('requested_by', SEARCH_KEY)
+        if changes is not None and local_cache.apply_changes(
+                self.cache_name, changes['upserted'], changes['removed'], sync.key,
+                sync.high_water_mark, exclude=exclude):
+            return
+        local_cache.save(self.cache_name, data, sync.key, sync.high_water_mark, exclude=exclude)
+
+    def _update_indexes(self, data):
+        """Runs on the loader thread after a sync; returns the search and sort indexes."""
+        changes = self._sync.last_changes
+        sort_index = self._sorter.index
+        if changes is None or self._index is None or sort_index is None:
+            # Full load: build new indexes without blocking searches on the old ones
+            return TrigramIndex(search_key, data), SortIndex(self._sort_keys, data)
+        for row in changes['removed']:
+            self._index.remove(row)
+            sort_index.remove(row)
+        for row in changes['upserted']:
+            self._index.update(row)
+            sort_index.update(row)
+        if changes['upserted']:
+            self._index.reorder(data)
+        return self._index, sort_index
+
+    def _on_data_ready(self, result):
+        if result.get('failed'):
+            if not self._loader.busy:
+                self.loading_label.place_forget()
+            if self.drawings:
+                self.sync_label.config(text="Offline – showing cached data")
+            return
+        if result['local']:
+            self._on_local_data(result)
             return
-            
-        self.is_loading = True
-        self.loading_label.place(relx=0.5, rely=0.5, anchor="center")
-        # Keep table_container visible so the user sees the page structure
-        if not self.table_container.winfo_viewable():
-            self.table_container.pack(expand=True, fill="both")
         
-        thread = threading.Thread(target=self._fetch_data_thread)
-        thread.daemon = True
-        thread.start()
-
-    def _fetch_data_thread(self):
-        data = self._generate_data()
-        self.after(0, lambda: self._on_data_ready(data))
-
-    def _on_data_ready(self, data):
-        self.drawings = data
-        self.filtered = list(self.drawings)
-        self.current_page = 0
-        self.is_loading = False
+        if not self.server_mode:
+            # Dataset outgrew local_limit; drop the in-memory copy and search on the server
+            self.server_mode = True
+            self._sync.reset()
+            self._index = None
+            self._sorter.index = None
+            self._search.index = None
+            self._search.remote = self._server_search
+        if not self._loader.busy:
+            self.loading_label.place_forget()
+        if result['query'] != self._search.query:
+            # Rows for an older query (or for none, right after switching modes)
+            self._server_search(self._search.query, False)
+            if self._server_query != result['query']:
+                return
         
-        self.loading_label.place_forget()
-        self._load_table()
+        append = result['append']
+        if append:
+            self.drawings.extend(result['data'])
+            if self._sorter.index is not None:
+                self._sorter.index.add_rows(result['data'])
+        else:
+            self.drawings = result['data']
+            # Sorting in server mode orders the rows loaded so far
+            self._sorter.index = SortIndex(self._sort_keys, self.drawings)
+        if result['total'] is not None:
+            self.total_records = result['total']
+        self.has_next = result['has_more']
+        # Already filtered by the server
+        self.filtered = self.drawings
+        self._load_table(keep_position=append)
+
+    def _server_search(self, query, keep_position):
+        """SearchController hook in server mode: runs the query as a fresh keyset load."""
+        if query == self._server_query and self.drawings:
+            return
+        self._server_query = query
+        self._start_loading()
 
-    def _generate_data(self):
+    def _on_local_data(self, result):
+        was_server = self.server_mode
+        self.server_mode = False
+        self._server_query = ""
+        self._search.remote = None
+        self.total_records = result['total']
+        if result['index'] is not None:
+            self._index = result['index']
+            self._sorter.index = result['sort_index']
+        self.sync_label.config(text=format_synced(result['synced_at']))
+        if not self._loader.busy:
+            self.loading_label.place_forget()
+        if not result['changed'] and not was_server and self.drawings is result['data']:
+            # Nothing changed since the last sync; keep the current view
+            if result['index'] is not None:
+                self._search.index = self._index
+                if self._sorter.column is not None:
+                    # Clicked while only the cached copy had no sort index
+                    self._load_table(keep_position=True)
+            return
+        
+        self.drawings = result['data']
+        # Keep the user's scroll position after a background sync
+        self._search_data(keep_position=True)
+
+    @staticmethod
+    def _get_db():
+        import sys
+        import os
+        # Ensure we can import db_handler from parent
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+        from db_handler import db
+        return db
+
+    @staticmethod
+    def _where(query=""):
+        """
+        WHERE clause for approved drawings, with a search pushed down as a
+        drawing_no prefix match so the (current_status, drawing_no) index
+        serves it. Returns (sql, params).
+        """
+        where = "current_status = 'Approved'"
+        if not query:
+            return where, ()
+        # '!' escapes LIKE wildcards the same way in MySQL and SQLite
+        pattern = query.replace("!", "!!").replace("%", "!%").replace("_", "!_") + "%"
+        return where + " AND drawing_no LIKE %s ESCAPE '!'", (pattern,)
+
+    @classmethod
+    def _count_data(cls, query=""):
         try:
-            import sys
-            import os
-            # Ensure we can import db_handler from parent
-            sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-            from db_handler import db
+            where, params = cls._where(query)
+            # Uncached: the delta sync compares it with the local copy
+            rows = cls._get_db().fetch_all(
+                "SELECT COUNT(*) AS total FROM drawings_master_bal WHERE " + where,
+                params or None, use_cache=False)
+            # COUNT(*) always returns a row, so no rows means the query failed
+            return int(rows[0]['total']) if rows else None
+        except Exception as e:
+            print("Error counting data: {}".format(e))
+            return None
+
+    def _generate_data(self, after=None, search=""):
+        """Fetches the next batch of approved drawings using keyset pagination on drawing_no."""
+        try:
+            db = self._get_db()
             
+            where, params = self._where(search)
             query = """
                 SELECT drawing_no as no, 
                        latest_revision as rev, 
                        current_status as status 
                 FROM drawings_master_bal 
-                WHERE current_status = 'Approved' 
-                LIMIT 11
-            """
-            data = db.fetch_all(query)
+                WHERE {}
+            """.format(where)
+            data, has_more = db.fetch_page(query, "drawing_no", after=after,
+                                           limit=self.fetch_size, params=params or None)
             
             if not data:
                 print("No data found or connection failed.")
-                return []
+                return [], False
             
             for item in data:
                 item['requested_by'] = ""
+                self._set_search_key(item)
                 
-            return data
+            return data, has_more
         except Exception as e:
             print("Error fetching data: {}".format(e))
-            return []
+            return [], False
 
     def _build_ui(self):
         # ── Header ───────────────────────────────────────────────
@@ -104,7 +348,7 @@ class DrawingRequestsPage(ttk.Frame):
         ttk.Label(header, text="Drawing Requisitions", style="Title.TLabel").pack(side="left")
 
         ttk.Button(header, text="Refresh", style="Flat.TButton", 
-                   command=self.refresh).pack(side="left", padx=20)
+                   command=self._force_refresh).pack(side="left", padx=20)
 
         # Search (right aligned)
         self.search_var = tk.StringVar()
@@ -119,79 +363,41 @@ class DrawingRequestsPage(ttk.Frame):
         
         self.search_entry.bind("<FocusIn>", self._clear_placeholder)
         self.search_entry.bind("<FocusOut>", self._restore_placeholder)
-        self.search_var.trace("w", self._search_data)
+        self.search_var.trace("w", self._on_search_typed)
 
         # ── Loading Indicator ───────────────────────────────────
         self.loading_label = ttk.Label(self, text="Loading data...", 
                                       font=("Segoe UI", 12), foreground="#64748b")
 
+        # ── FIXED Footer (always at bottom) ──────────────────────
+        footer = tk.Frame(self, bg=styles.LIGHT, height=50)
+        footer.pack(side="bottom", fill="x", pady=10, padx=10)
+        footer.pack_propagate(False)   # ← important: prevents height collapse
+
         # ── Table Area ───────────────────────────────────────────
-        self.table_container = tk.Frame(self, bg="white", 
-                                       highlightthickness=1, highlightbackground="#cbd5e1")
-        self.table_container.pack(expand=True, fill="both")
-
-        # Header (resizable columns)
-        self.header_paned = tk.PanedWindow(self.table_container, orient="horizontal",
-                                          bg="#e2e8f0", bd=0, sashwidth=2, sashpad=0)
-        self.header_paned.pack(fill="x")
-        
-        headers = ["Drawing ID", "Revision", "Status", "Requested By", "Action"]
-        min_widths = [110, 70, 80, 150, 80]
-        self.header_frames = []
-        
-        for i, h in enumerate(headers):
-            f = tk.Frame(self.header_paned, bg="#f1f5f9", width=self.col_widths[i], height=40)
-            f.pack_propagate(False)
-            lbl = tk.Label(f, text=h, font=("Segoe UI", 10, "bold"),
-                           bg="#f1f5f9", fg=styles.DARK)
-            lbl.pack(expand=True, fill="both")
-            self.header_paned.add(f, minsize=min_widths[i])
-            self.header_frames.append(f)
-            f.bind("<Configure>", lambda e: self._sync_columns())
-
-        # Body
-        self.body_frame = tk.Frame(self.table_container, bg="white")
-        self.body_frame.pack(expand=True, fill="both")
-
-        # ── FIXED Pagination (always at bottom) ──────────────────
-        pager = tk.Frame(self, bg=styles.LIGHT, height=50)
-        pager.pack(side="bottom", fill="x", pady=10, padx=10)
-        pager.pack_propagate(False)   # ← important: prevents height collapse
-
-        # Navigation buttons + labels centered
-        nav_frame = tk.Frame(pager, bg=styles.LIGHT)
-        nav_frame.place(relx=0.5, rely=0.5, anchor="center")
-
-        ttk.Button(nav_frame, text="◀ Previous", style="Flat.TButton",
-                   command=self._prev_page).pack(side="left", padx=8)
-
-        self.page_label = ttk.Label(nav_frame, text="Page 1 of 1", 
-                                   font=("Segoe UI", 10, "bold"))
-        self.page_label.pack(side="left", padx=20)
-
-        ttk.Button(nav_frame, text="Next ▶", style="Flat.TButton",
-                   command=self._next_page).pack(side="left", padx=8)
-
-        self.records_label = tk.Label(pager, text="", 
+        self.table = CanvasTable(
+            self,
+            headers=["Drawing ID", "Revision", "Status", "Requested By", "Action"],
+            col_widths=[150, 80, 100, 200, 120],
+            min_widths=[110, 70, 80, 150, 80],
+            values=self._row_values,
+            actions=[("Request", "Action", lambda d: self._handle_request(d.get("no")))],
+            cell_options={3: {"fg": "#4f46e5", "font": ("Segoe UI", 9, "italic")}},
+            on_view_change=self._on_view_change,
+            on_sort=self._on_sort)
+        self.table.pack(expand=True, fill="both")
+
+        self.records_label = tk.Label(footer, text="", 
                                      font=("Segoe UI", 9), fg="#64748b", bg=styles.LIGHT)
         self.records_label.place(relx=1.0, rely=0.5, anchor="e", x=-10)
 
-        # Load initial data
-        # self._load_table() # Called after data loads now
+        self.sync_label = tk.Label(footer, text="",
+                                   font=("Segoe UI", 9), fg="#94a3b8", bg=styles.LIGHT)
+        self.sync_label.place(relx=0.0, rely=0.5, anchor="w", x=10)
 
-    def _sync_columns(self):
-        for i, f in enumerate(self.header_frames):
-            try:
-                self.col_widths[i] = f.winfo_width()
-            except:
-                pass
-        
-        for row_dict in self.row_widgets:
-            for i, cell in enumerate(row_dict['cells']):
-                try:
-                    cell.config(width=self.col_widths[i])
-                except:
-                    pass
+    def _row_values(self, d):
+        status_val = str(d.get("status") or "N/A").upper()
+        return [d.get("no", "N/A"), d.get("rev", "N/A"), status_val, d.get("requested_by", "")]
 
     def _clear_placeholder(self, e):
         if self.search_entry.get() == "Search drawings...":
@@ -203,90 +409,32 @@ class DrawingRequestsPage(ttk.Frame):
             self.search_entry.insert(0, "Search drawings...")
             self.search_entry.config(fg="#94a3b8")
 
-    def _load_table(self):
-        start = self.current_page * self.page_size
-        end = start + self.page_size
-        page_data = self.filtered[start:end]
-        
-        for i in range(self.page_size):
-            if i < len(page_data):
-                d = page_data[i]
-                bg = "white" if i % 2 == 0 else "#fbfcfd"
-                
-                if i >= len(self.row_widgets):
-                    row_frame = tk.Frame(self.body_frame, bg="white")
-                    row_frame.pack(fill="x")
-                    
-                    cells = []
-                    labels = []
-                    
-                    for j in range(4):
-                        cell = tk.Frame(row_frame, bg="white", width=self.col_widths[j], height=45)
-                        cell.pack_propagate(False)
-                        cell.pack(side="left")
-                        
-                        lbl = tk.Label(cell, font=("Segoe UI", 10), fg="#334155", bg="white")
-                        lbl.pack(expand=True, fill="both", padx=5)
-                        
-                        cells.append(cell)
-                        labels.append(lbl)
-                    
-                    action_cell = tk.Frame(row_frame, bg="white", width=self.col_widths[4], height=45)
-                    action_cell.pack_propagate(False)
-                    action_cell.pack(side="left")
-                    
-                    btn = ttk.Button(action_cell, text="Request", style="Action.TButton")
-                    btn.pack(expand=True)
-                    
-                    cells.append(action_cell)
-                    
-                    row_dict = {
-                        'frame': row_frame,
-                        'cells': cells,
-                        'labels': labels,
-                        'action_cell': action_cell,
-                        'button': btn
-                    }
-                    self.row_widgets.append(row_dict)
-                    
-                    row_frame.bind("<Enter>", lambda e, r=row_frame: self._on_row_enter(r))
-
-                else:
-                    row_dict = self.row_widgets[i]
-                    if not row_dict['frame'].winfo_viewable():
-                        row_dict['frame'].pack(fill="x")
-                
-                row_dict['frame'].configure(bg=bg)
-                row_dict['frame'].bind("<Leave>", lambda e, r=row_dict['frame'], b=bg: self._on_row_leave(r, b))
-                
-                status_val = str(d.get("status") or "N/A").upper()
-                vals = [d.get("no", "N/A"), d.get("rev", "N/A"), status_val, d.get("requested_by", "")]
-                
-                for j, (lbl, cell, val) in enumerate(zip(row_dict['labels'], row_dict['cells'][:4], vals)):
-                    lbl.configure(text=val, bg=bg)
-                    cell.configure(bg=bg)
-                    if j == 3:
-                        lbl.configure(fg="#4f46e5", font=("Segoe UI", 9, "italic"))
-                
-                row_dict['action_cell'].configure(width=self.col_widths[4], bg=bg)
-                row_dict['button'].configure(command=lambda dn=d.get("no"), idx=i: self._handle_request(dn, idx))
-            
-            elif i < len(self.row_widgets):
-                self.row_widgets[i]['frame'].pack_forget()
+    def _load_table(self, keep_position=False):
+        self.table.set_data(self._sorter.apply(self.filtered), keep_position=keep_position)
 
-        # Update pagination info
-        total_records = len(self.filtered)
-        total_pages = max(1, (total_records + self.page_size - 1) // self.page_size)
-        current = self.current_page + 1
-        
-        start_record = start + 1 if total_records > 0 else 0
-        end_record = min(end, total_records)
-        
-        self.page_label.config(text="Page {} of {}".format(current, total_pages))
+    def _on_sort(self, column):
+        self._sorter.toggle(column)
+        self.table.show_sort(self._sorter.column, self._sorter.descending)
+        self._load_table()
+
+    def _sort_keys(self, d):
+        return tuple(sort_value(v) for v in self._row_values(d))
+
+    def _on_view_change(self, first, last, total):
+        if self.server_mode and len(self.filtered) == len(self.drawings):
+            # Not searching: count the rows not loaded yet as well
+            total_records = max(self.total_records, len(self.drawings))
+        else:
+            total_records = total
         self.records_label.config(text="Showing {}–{} of {} records".format(
-            start_record, end_record, total_records))
+            first + 1 if total else 0, last + 1 if total else 0, total_records))
+        
+        # Server mode: fetch the next batch as the end of the loaded rows comes into view
+        if self.server_mode and self.has_next and not self._loader.busy and self.drawings \
+                and last >= total - 1 - self.fetch_size // 4:
+            self._start_loading(after=self.drawings[-1].get("no"))
 
-    def _handle_request(self, drawing_no, row_idx=None):
+    def _handle_request(self, drawing_no):
         confirm = messagebox.askyesno("Confirm Request", 
                                      "Request drawing no {}?".format(drawing_no))
         if not confirm:
@@ -298,60 +446,41 @@ class DrawingRequestsPage(ttk.Frame):
         for d in self.drawings:
             if d.get("no") == drawing_no:
                 d['requested_by'] = status_text
+                self._set_search_key(d)
+                if self._index is not None:
+                    self._index.update(d)
+                if self._sorter.index is not None:
+                    self._sorter.index.update(d)
+                # Earlier results were filtered on the old search text
+                self._search.invalidate()
                 break
         
-        if row_idx is not None and row_idx < len(self.row_widgets):
-            self.row_widgets[row_idx]['labels'][3].configure(text=status_text)
+        # Re-applies the sort, which may have moved the row
+        self._load_table(keep_position=True)
             
         messagebox.showinfo("Request", "Request submitted for {}".format(drawing_no))
 
+    def _force_refresh(self):
+        """Refresh button: bypass cached results so status changes show up."""
+        self._get_db().invalidate_cache("drawings_master_bal")
+        self.refresh()
+
     def refresh(self):
         self._start_loading()
 
-    def _on_row_enter(self, row):
-        highlight_bg = "#f1f5f9"
-        row.configure(bg=highlight_bg)
-        for child in row.winfo_children():
-            child.configure(bg=highlight_bg)
-            if isinstance(child, tk.Frame):
-                for gc in child.winfo_children():
-                    try:
-                        gc.configure(bg=highlight_bg)
-                    except:
-                        pass
-
-    def _on_row_leave(self, row, original_bg):
-        row.configure(bg=original_bg)
-        for child in row.winfo_children():
-            child.configure(bg=original_bg)
-            if isinstance(child, tk.Frame):
-                for gc in child.winfo_children():
-                    try:
-                        gc.configure(bg=original_bg)
-                    except:
-                        pass
-
-    def _search_data(self, *args):
-        q = self.search_var.get().lower().strip()
-        if q in ("", "search drawings..."):
-            self.filtered = list(self.drawings)
-        else:
-            self.filtered = [
-                d for d in self.drawings
-                if q in str(d.get("no", "")).lower()
-                or q in str(d.get("rev", "")).lower()
-                or q in str(d.get("status", "")).lower()
-                or q in str(d.get("requested_by", "")).lower()
-            ]
-        self.current_page = 0
-        self._load_table()
+    def _on_search_typed(self, *args):
+        q = self.search_var.get()
+        self._search.set_query("" if q == "Search drawings..." else q)
+
+    @staticmethod
+    def _set_search_key(d):
+        d[SEARCH_KEY] = search_text(d.get("no", ""), d.get("rev", ""),
+                                    d.get("status", ""), d.get("requested_by", ""))
 
-    def _prev_page(self):
-        if self.current_page > 0:
-            self.current_page -= 1
-            self._load_table()
+    def _search_data(self, keep_position=False):
+        """Re-applies the current search to freshly loaded data."""
+        self._search.set_rows(self.drawings, keep_position=keep_position, index=self._index)
 
-    def _next_page(self):
-        if (self.current_page + 1) * self.page_size < len(self.filtered):
-            self.current_page += 1
-            self._load_table()
+    def _on_search_results(self, rows, keep_position):
+        self.filtered = rows
+        self._load_table(keep_position=keep_position)
@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+try:
+    import styles
+except ImportError:
+    class DummyStyles:
+        LIGHT = "#f8fafc"
+        DARK = "#1e293b"
+        PRIMARY = "#3b82f6"
+    styles = DummyStyles()
+
+ROW_BG = ("white", "#fbfcfd")     # Alternating row stripes
+HOVER_BG = "#f1f5f9"
+
+# Column widths the user dragged to, by table headers; outlives the page,
+# so a rebuilt table opens with the same layout
+_saved_widths = {}
+
+class VirtualTable(tk.Frame):
+    """
+    Scrolling table that only builds widgets for the rows on screen.
+
+    The data source is any sequence (len() and indexing), so a list of 100k
+    dicts costs no more widgets than a list of ten. Scrolling does not move
+    widgets around; the same row slots are re-filled with the records that
+    are now in view, and a slot whose content did not change is left alone.
+    Rows have no hover highlight; the pages use CanvasTable, where Tk does
+    that itself.
+
+    Args:
+        headers: Column titles; the last one is the action column when
+                 build_actions is given.
+        col_widths: Initial column widths in pixels, unless the user already
+                    resized a table with the same headers.
+        min_widths: Minimum widths for the resizable header panes.
+        values: values(record) -> list of cell texts for the data columns.
+        build_actions: build_actions(frame) fills the action cell of a new row
+                       slot and returns bind(record), which is called whenever
+                       the slot shows a different record.
+        cell_options: {column index: Label options} for styled columns.
+        on_view_change: on_view_change(first, last, total) after each render,
+                        with first/last as 0-based indexes of the visible rows.
+        on_sort: on_sort(column) when a data column header is clicked; the
+                 page re-orders its rows and calls show_sort().
+    """
+    def __init__(self, parent, headers, col_widths, min_widths, values,
+                 build_actions=None, cell_options=None, on_view_change=None,
+                 row_height=45, wheel_rows=3, on_sort=None):
+        tk.Frame.__init__(self, parent, bg="white",
+                          highlightthickness=1, highlightbackground="#cbd5e1")
+        self.headers = headers
+        self._widths_key = tuple(headers)
+        self.col_widths = list(_saved_widths.get(self._widths_key, col_widths))
+        self.min_widths = min_widths
+        self.values = values
+        self.build_actions = build_actions
+        self.cell_options = cell_options or {}
+        self.on_view_change = on_view_change
+        self.on_sort = on_sort
+        self.row_height = row_height
+        self.wheel_rows = wheel_rows
+
+        self.data = []
+        self.first = 0          # Index of the record in the top slot
+        self.slots = []         # Row widgets, reused for whatever is in view
+        self._visible = 0       # Slots that fit in the body
+        self._sync_pending = None   # after_idle id of the coalesced column sync
+        # Every row widget carries this bind tag, so wheel scrolling is bound once
+        self._tag = "VirtualTable{}".format(id(self))
+
+        self._build_ui()
+
+    def _build_ui(self):
+        # Header (resizable columns)
+        self.header_paned = tk.PanedWindow(self, orient="horizontal",
+                                           bg="#e2e8f0", bd=0, sashwidth=2, sashpad=0)
+        self.header_paned.pack(fill="x")
+
+        self.header_frames = []
+        self.header_labels = []
+        for i, h in enumerate(self.headers):
+            f = tk.Frame(self.header_paned, bg="#f1f5f9", width=self.col_widths[i], height=40)
+            f.pack_propagate(False)
+            lbl = tk.Label(f, text=h, font=("Segoe UI", 10, "bold"),
+                           bg="#f1f5f9", fg=styles.DARK)
+            lbl.pack(expand=True, fill="both")
+            if self.on_sort and i < self._data_columns():
+                lbl.configure(cursor="hand2")
+                lbl.bind("<Button-1>", lambda e, i=i: self.on_sort(i))
+            self.header_labels.append(lbl)
+            self.header_paned.add(f, minsize=self.min_widths[i])
+            self.header_frames.append(f)
+            f.bind("<Configure>", self._schedule_sync)
+
+        # Body + scrollbar
+        viewport = tk.Frame(self, bg="white")
+        viewport.pack(expand=True, fill="both")
+
+        self.scrollbar = ttk.Scrollbar(viewport, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.body = self._build_body(viewport)
+        self.body.pack(side="left", expand=True, fill="both")
+        self.body.bind("<Configure>", self._on_body_resize)
+        self._add_tag(self.body)
+
+        self.bind_class(self._tag, "<MouseWheel>", self._on_wheel)
+        self.bind_class(self._tag, "<Button-4>", lambda e: self.scroll_by(-self.wheel_rows))
+        self.bind_class(self._tag, "<Button-5>", lambda e: self.scroll_by(self.wheel_rows))
+
+    def _build_body(self, parent):
+        return tk.Frame(parent, bg="white")
+
+    def show_sort(self, column, descending=False):
+        """Marks the sorted column header; column None clears the mark."""
+        for i, lbl in enumerate(self.header_labels):
+            mark = ""
+            if i == column:
+                mark = " \u25bc" if descending else " \u25b2"
+            lbl.configure(text=self.headers[i] + mark)
+
+    def _add_tag(self, widget):
+        widget.bindtags((self._tag,) + widget.bindtags())
+
+    def _data_columns(self):
+        return len(self.headers) - (1 if self.build_actions else 0)
+
+    # ─────────────────────────────────────────────────────────────────
+    # Row slots
+    # ─────────────────────────────────────────────────────────────────
+
+    def _create_slot(self, position):
+        n_data = self._data_columns()
+        row_frame = tk.Frame(self.body, bg="white")
+        cells = []
+        labels = []
+        for j in range(n_data):
+            cell = tk.Frame(row_frame, bg="white", width=self.col_widths[j], height=self.row_height)
+            cell.pack_propagate(False)
+            cell.pack(side="left")
+            lbl = tk.Label(cell, font=("Segoe UI", 10), fg="#334155", bg="white")
+            lbl.configure(**self.cell_options.get(j, {}))
+            lbl.pack(expand=True, fill="both", padx=5)
+            cells.append(cell)
+            labels.append(lbl)
+
+        slot = {
+            'frame': row_frame,
+            'cells': cells,
+            'labels': labels,
+            'tinted': [row_frame] + cells + labels,   # Widgets that take the row colour
+            'texts': [None] * n_data,                 # What the labels show now
+            'record': None,
+            'index': None,
+            'bg': "white",
+            'bind': None,
+        }
+
+        if self.build_actions:
+            action_cell = tk.Frame(row_frame, bg="white",
+                                   width=self.col_widths[n_data], height=self.row_height)
+            action_cell.pack_propagate(False)
+            action_cell.pack(side="left")
+            btn_frame = tk.Frame(action_cell, bg="white")
+            btn_frame.place(relx=0.5, rely=0.5, anchor="center")
+            slot['bind'] = self.build_actions(btn_frame)
+            cells.append(action_cell)
+            slot['tinted'] += [action_cell, btn_frame]
+
+        # Bindings are made once here; rendering never re-binds
+        for w in self._descendants(row_frame):
+            self._add_tag(w)
+        return slot
+
+    def _descendants(self, widget):
+        result = [widget]
+        for child in widget.winfo_children():
+            result.extend(self._descendants(child))
+        return result
+
+    def _stripe(self, index):
+        return ROW_BG[(index or 0) % 2]
+
+    def _set_slot_bg(self, slot, bg):
+        if slot['bg'] == bg:
+            return
+        slot['bg'] = bg
+        for w in slot['tinted']:
+            w.configure(bg=bg)
+
+    def _on_body_resize(self, event):
+        self.set_visible_rows(max(1, event.height // self.row_height + 1))
+
+    def set_visible_rows(self, visible):
+        """Sets how many row slots are rendered; normally driven by the body height."""
+        if visible == self._visible:
+            return
+        self._visible = visible
+        while len(self.slots) < visible:
+            self.slots.append(self._create_slot(len(self.slots)))
+        self.scroll_to(self.first)
+
+    # ─────────────────────────────────────────────────────────────────
+    # Data and scrolling
+    # ─────────────────────────────────────────────────────────────────
+
+    def set_data(self, data, keep_position=False):
+        """Shows a new data source, from the top unless keep_position is set."""
+        self.data = data
+        for slot in self.slots:
+            slot['record'] = None   # Re-bind actions even if the index is unchanged
+        self.scroll_to(self.first if keep_position else 0)
+
+    def refresh(self):
+        """Re-renders the visible rows, e.g. after a record was edited in place."""
+        for slot in self.slots:
+            slot['record'] = None
+        self._render()
+
+    def _full_rows(self):
+        return max(1, self.body.winfo_height() // self.row_height)
+
+    def scroll_to(self, first):
+        last_top = max(0, len(self.data) - self._full_rows())
+        self.first = max(0, min(int(first), last_top))
+        self._render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.first + rows)
+
+    def _on_wheel(self, event):
+        if abs(event.delta) >= 120:
+            # Windows: multiples of 120 per notch
+            self.scroll_by(-(event.delta // 120) * self.wheel_rows)
+        elif event.delta:
+            # macOS: small signed deltas
+            self.scroll_by(-event.delta)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * len(self.data))
+        elif unit == "pages":
+            self.scroll_by(int(amount) * self._full_rows())
+        else:
+            self.scroll_by(int(amount))
+
+    def _render(self):
+        total = len(self.data)
+        self._paint(total)
+
+        shown = max(0, min(self._visible, total - self.first))
+        if total:
+            self.scrollbar.set(float(self.first) / total,
+                               float(self.first + min(shown, self._full_rows())) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        if self.on_view_change is not None and self._visible:
+            self.on_view_change(self.first, self.first + shown - 1, total)
+
+    def _paint(self, total):
+        for i, slot in enumerate(self.slots):
+            index = self.first + i
+            if i >= self._visible or index >= total:
+                if slot['index'] is not None:
+                    slot['frame'].place_forget()
+                    slot['index'] = None
+                    slot['record'] = None
+                continue
+
+            record = self.data[index]
+            if slot['index'] is None:
+                slot['frame'].place(x=0, y=i * self.row_height,
+                                    relwidth=1.0, height=self.row_height)
+            slot['index'] = index
+            self._set_slot_bg(slot, self._stripe(index))
+
+            if slot['record'] is not record:
+                slot['record'] = record
+                texts = self.values(record)
+                for j, text in enumerate(texts):
+                    if slot['texts'][j] != text:
+                        slot['texts'][j] = text
+                        slot['labels'][j].configure(text=text)
+                if slot['bind'] is not None:
+                    slot['bind'](record)
+
+    def _schedule_sync(self, event=None):
+        # Dragging a sash resizes several header frames per motion event;
+        # they all end up in one pass once Tk is idle
+        if self._sync_pending is None:
+            self._sync_pending = self.after_idle(self._sync_columns)
+
+    def _sync_columns(self):
+        self._sync_pending = None
+        try:
+            widths = [f.winfo_width() for f in self.header_frames]
+        except tk.TclError:
+            return   # Destroyed before the idle pass ran
+        old = self.col_widths
+        changed = [i for i, w in enumerate(widths) if w != old[i]]
+        if not changed:
+            return
+        self.col_widths = widths
+        _saved_widths[self._widths_key] = list(widths)
+        self._apply_widths(old, changed)
+
+    def _apply_widths(self, old, changed):
+        """Lays the row slots out for col_widths; old are the widths they have now."""
+        for slot in self.slots:
+            cells = slot['cells']
+            for i in changed:
+                if i < len(cells):
+                    cells[i].configure(width=self.col_widths[i])
+
+# ─────────────────────────────────────────────────────────────────
+# Canvas renderer
+# ─────────────────────────────────────────────────────────────────
+
+# (background, active background) of the buttons, matching the ttk styles
+BUTTON_COLOURS = {
+    "Action": ("#4f46e5", "#4338ca"),
+    "Success": ("#10b981", "#059669"),
+    "Danger": ("#dc2626", "#b91c1c"),
+}
+
+# Applies every item change of a repaint in a single call across the Tcl bridge
+_PAINT_PROC = """
+proc ::dms_canvas_paint {canvas items options values} {
+    foreach item $items option $options value $values {
+        $canvas itemconfigure $item $option $value
+    }
+}
+"""
+
+class CanvasTable(VirtualTable):
+    """
+    VirtualTable drawn on a single tk.Canvas instead of per-row widgets.
+
+    A row slot is a background rectangle, one text item per cell and a
+    rectangle plus caption per action button. Rendering collects the item
+    options that actually changed and applies them with one Tcl call, so a
+    repaint is one round trip instead of several configure() calls per row.
+    Text that does not fit its column is cut with an ellipsis.
+
+    Takes the same arguments as VirtualTable except build_actions:
+
+        actions: List of (caption, style, handler). style is a key of
+                 BUTTON_COLOURS and handler(record) runs on click.
+    """
+    def __init__(self, parent, headers, col_widths, min_widths, values,
+                 actions=None, cell_options=None, on_view_change=None,
+                 row_height=45, wheel_rows=3, on_sort=None):
+        self.actions = actions or []
+        self._fonts = {}          # font description -> tkfont.Font, for measuring
+        self._char_widths = {}    # font description -> width of "0", for eliding
+        VirtualTable.__init__(self, parent, headers, col_widths, min_widths, values,
+                              cell_options=cell_options, on_view_change=on_view_change,
+                              row_height=row_height, wheel_rows=wheel_rows,
+                              on_sort=on_sort)
+
+    def _build_body(self, parent):
+        canvas = tk.Canvas(parent, bg="white", highlightthickness=0, bd=0)
+        canvas.tk.eval(_PAINT_PROC)
+        # Bound per tag rather than per item, so slots come and go without re-binding
+        for k in range(len(self.actions)):
+            canvas.tag_bind("action{}".format(k), "<Button-1>",
+                            lambda e, k=k: self._on_action(k))
+        return canvas
+
+    def _data_columns(self):
+        return len(self.headers) - (1 if self.actions else 0)
+
+    def _cell_style(self, j):
+        options = self.cell_options.get(j, {})
+        return options.get("font", ("Segoe UI", 10)), options.get("fg", "#334155")
+
+    def _measure(self, font, text):
+        if font not in self._fonts:
+            self._fonts[font] = tkfont.Font(root=self, font=font)
+        return self._fonts[font].measure(text)
+
+    def _char_width(self, font):
+        if font not in self._char_widths:
+            self._char_widths[font] = max(1, self._measure(font, "0"))
+        return self._char_widths[font]
+
+    def _column_x(self, widths=None):
+        xs = [0]
+        for w in (widths or self.col_widths):
+            xs.append(xs[-1] + w)
+        return xs
+
+    def _button_layout(self, col_widths=None):
+        """(x0, x1) of each action button, relative to the action column."""
+        widths = [self._measure(("Segoe UI", 9, "bold"), caption) + 24
+                  for caption, _, _ in self.actions]
+        x = ((col_widths or self.col_widths)[self._data_columns()]
+             - sum(widths) - 6 * (len(widths) - 1)) // 2
+        layout = []
+        for w in widths:
+            layout.append((x, x + w))
+            x += w + 6
+        return layout
+
+    def _create_slot(self, position):
+        c = self.body
+        y0 = position * self.row_height
+        ym = y0 + self.row_height // 2
+        tag = "row{}".format(position)
+        live = (tag, tag + ".live")      # Shown as "normal"
+        inert = (tag, tag + ".inert")    # Shown as "disabled": ignores the pointer
+        xs = self._column_x()
+
+        # Wide enough for any window; the canvas clips it
+        bg = c.create_rectangle(0, y0, 10000, y0 + self.row_height, fill="white",
+                                outline="", activefill=HOVER_BG, state="hidden", tags=live)
+        texts = []
+        for j in range(self._data_columns()):
+            font, fill = self._cell_style(j)
+            texts.append(c.create_text((xs[j] + xs[j + 1]) // 2, ym, text="", font=font,
+                                       fill=fill, state="hidden",
+                                       tags=inert + ("col{}".format(j),)))
+
+        buttons = []
+        x_action = xs[self._data_columns()]
+        for k, ((caption, style, _), (bx0, bx1)) in enumerate(zip(self.actions, self._button_layout())):
+            normal, active = BUTTON_COLOURS[style]
+            button_tag = "action{}".format(k)
+            rect = c.create_rectangle(x_action + bx0, ym - 14, x_action + bx1, ym + 14,
+                                      fill=normal, activefill=active, outline="",
+                                      state="hidden", tags=live + (button_tag,))
+            text = c.create_text(x_action + (bx0 + bx1) // 2, ym, text=caption, fill="white",
+                                 font=("Segoe UI", 9, "bold"), state="hidden",
+                                 tags=inert + (button_tag,))
+            buttons.append((rect, text))
+
+        return {
+            'tag': tag,
+            'bg_item': bg,
+            'text_items': texts,
+            'buttons': buttons,
+            'texts': [None] * len(texts),
+            'record': None,
+            'index': None,
+            'bg': "white",
+        }
+
+    def _on_action(self, k):
+        # Bound once per action tag; the clicked rectangle's row tag names the slot
+        for tag in self.body.gettags("current"):
+            if tag.startswith("row") and "." not in tag:
+                record = self.slots[int(tag[3:])]['record']
+                if record is not None:
+                    self.actions[k][2](record)
+                return
+
+    def _elide(self, text, j):
+        font = self._cell_style(j)[0]
+        max_chars = max(1, (self.col_widths[j] - 10) // self._char_width(font))
+        if len(text) > max_chars:
+            return text[:max_chars - 1] + "…"
+        return text
+
+    def _paint(self, total):
+        items, options, values = [], [], []
+        for i, slot in enumerate(self.slots):
+            index = self.first + i
+            if i >= self._visible or index >= total:
+                if slot['index'] is not None:
+                    items.append(slot['tag'])
+                    options.append("-state")
+                    values.append("hidden")
+                    slot['index'] = None
+                    slot['record'] = None
+                continue
+
+            record = self.data[index]
+            if slot['index'] is None:
+                items.extend((slot['tag'] + ".live", slot['tag'] + ".inert"))
+                options.extend(("-state", "-state"))
+                values.extend(("normal", "disabled"))
+            slot['index'] = index
+
+            stripe = self._stripe(index)
+            if slot['bg'] != stripe:
+                slot['bg'] = stripe
+                items.append(slot['bg_item'])
+                options.append("-fill")
+                values.append(stripe)
+
+            if slot['record'] is not record:
+                slot['record'] = record
+                for j, text in enumerate(self.values(record)):
+                    text = self._elide(str(text), j)
+                    if slot['texts'][j] != text:
+                        slot['texts'][j] = text
+                        items.append(slot['text_items'][j])
+                        options.append("-text")
+                        values.append(text)
+
+        if items:
+            self.tk.call("::dms_canvas_paint", self.body._w,
+                         tuple(items), tuple(options), tuple(values))
+
+    def _apply_widths(self, old, changed):
+        # Every row's text for column j carries the tag col{j} and every row's
+        # button k the tag action{k}, so each moved column is one canvas move
+        c = self.body
+        n_data = self._data_columns()
+        old_xs = self._column_x(old)
+        xs = self._column_x()
+        for j in range(min(changed), n_data):
+            dx = (xs[j] + xs[j + 1]) // 2 - (old_xs[j] + old_xs[j + 1]) // 2
+            if dx:
+                c.move("col{}".format(j), dx, 0)
+        if self.actions:
+            old_layout = self._button_layout(old)
+            for k, (bx0, _) in enumerate(self._button_layout()):
+                dx = xs[n_data] + bx0 - (old_xs[n_data] + old_layout[k][0])
+                if dx:
+                    c.move("action{}".format(k), dx, 0)
+
+        resized = [j for j in changed if j < n_data]
+        if resized:
+            # Texts are cut to the column width, so recompute them
+            for slot in self.slots:
+                for j in resized:
+                    slot['texts'][j] = None
+                slot['record'] = None
+            self._render()
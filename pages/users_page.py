@@ -6,7 +6,13 @@ from tkinter import ttk
 from tkinter import messagebox
 import hashlib
 import json
-import threading
+import time
+from scheduler import scheduler, SingleFlight, TaskScheduler
+from local_cache import local_cache, format_synced
+from pages.table import CanvasTable
+from search import SearchController, TrigramIndex, SEARCH_KEY, search_text, search_key, matches_key
+from sorting import SortIndex, TableSorter, sort_value
+from prefetch import data_store
 
 try:
     import styles
@@ -22,21 +28,71 @@ except ImportError:
     styles = DummyStyles()
 
 class UsersPage(ttk.Frame):
+    # Name of the dataset in the local cache and the prefetch store
+    cache_name = "users"
+
     def __init__(self, parent):
         ttk.Frame.__init__(self, parent, style="Card.TFrame", padding=25)
         self.pack(expand=True, fill="both", padx=20, pady=20)
         
         self.users = []
         self.filtered = []
-        self.page_size = 10
-        self.current_page = 0
+        self._reading_cache = True   # refresh() waits until the cached copy is painted
         
-        # Column configuration: [ID, Username, Department, Permissions, Actions]
-        self.col_widths = [50, 150, 150, 250, 150]
-        self.row_widgets = []  # Cache for row widgets
+        # Coalesces overlapping refreshes: one query in flight, at most one trailing
+        self._loader = SingleFlight(scheduler, "users.refresh",
+                                    self._fetch_data, self._on_data_ready)
+        # Waits for a pause in typing; big datasets are filtered off the main thread
+        self._search = SearchController(self, matches_key, self._on_search_results,
+                                        delay=200, threshold=5000)
+        self._sorter = TableSorter()
         
         self._build_ui()
-        self.after(100, self.refresh)
+        
+        # Paint the last-known users as soon as they are decoded, then reconcile
+        self._paint_from_cache()
+
+    def _paint_from_cache(self):
+        # Loaded in the background right after login, if this page was not
+        # the first; a prefetch still running is waited for, not repeated
+        data_store.take(self.cache_name, self._on_prefetched)
+
+    def _on_prefetched(self, prefetched):
+        scheduler.submit(("users.cache", id(self)), self._read_cache, (prefetched,),
+                         callback=self._on_cache_ready, errback=self._on_cache_failed,
+                         priority=TaskScheduler.HIGH)
+
+    @classmethod
+    def _read_cache(cls, prefetched):
+        """Runs on a worker: the users from the prefetched snapshot or the disk cache."""
+        cached = prefetched or local_cache.load(cls.cache_name)
+        if not cached:
+            return None
+        users, _, synced_at = cached
+        if prefetched:
+            return users, format_synced(synced_at)
+        for user in users:
+            cls._set_search_key(user)
+        return users, format_synced(synced_at) + " (cached)"
+
+    def _on_cache_ready(self, cached):
+        self._reading_cache = False
+        if cached is not None:
+            self.users, synced = cached
+            self.sync_label.config(text=synced)
+            self._search_data()
+        self.refresh()
+
+    def _on_cache_failed(self, error):
+        self._reading_cache = False
+        print("Error reading cached users: {}".format(error))
+        self.refresh()
+
+    @classmethod
+    def prefetch_data(cls):
+        """Loads the users for data_store, on a worker right after login."""
+        data = cls._fetch_data()
+        return (data, None) if data else None
 
     def _build_ui(self):
         # Header
@@ -49,7 +105,7 @@ class UsersPage(ttk.Frame):
                    command=self._show_add_user_dialog).pack(side="left", padx=20)
         
         ttk.Button(header, text="Refresh", style="Flat.TButton",
-                   command=self.refresh).pack(side="left", padx=10)
+                   command=self._force_refresh).pack(side="left", padx=10)
         
         # Search
         self.search_var = tk.StringVar()
@@ -63,79 +119,56 @@ class UsersPage(ttk.Frame):
         self.search_entry.insert(0, "Search users...")
         self.search_entry.bind("<FocusIn>", self._clear_placeholder)
         self.search_entry.bind("<FocusOut>", self._restore_placeholder)
-        self.search_var.trace("w", self._search_data)
-        
-        # ── Table Area (Matching DrawingRequestsPage) ───────────────────────────
-        self.table_container = tk.Frame(self, bg="white", 
-                                       highlightthickness=1, highlightbackground="#cbd5e1")
-        self.table_container.pack(expand=True, fill="both")
-        
-        # Header (resizable columns using PanedWindow)
-        self.header_paned = tk.PanedWindow(self.table_container, orient="horizontal",
-                                          bg="#e2e8f0", bd=0, sashwidth=2, sashpad=0)
-        self.header_paned.pack(fill="x")
-        
-        headers = ["ID", "Username", "Department", "Permissions", "Actions"]
-        min_widths = [40, 100, 100, 150, 120]
-        self.header_frames = []
-        
-        for i, h in enumerate(headers):
-            f = tk.Frame(self.header_paned, bg="#f1f5f9", width=self.col_widths[i], height=40)
-            f.pack_propagate(False)
-            lbl = tk.Label(f, text=h, font=("Segoe UI", 10, "bold"),
-                           bg="#f1f5f9", fg=styles.DARK)
-            lbl.pack(expand=True, fill="both")
-            self.header_paned.add(f, minsize=min_widths[i])
-            self.header_frames.append(f)
-            f.bind("<Configure>", lambda e: self._sync_columns())
-            
-        # Body
-        self.body_frame = tk.Frame(self.table_container, bg="white")
-        self.body_frame.pack(expand=True, fill="both")
-        
-        # ── FIXED Pagination (always at bottom) ──────────────────
-        pager = tk.Frame(self, bg=styles.LIGHT, height=50)
-        pager.pack(side="bottom", fill="x", pady=10, padx=10)
-        pager.pack_propagate(False)
-        
-        nav_frame = tk.Frame(pager, bg=styles.LIGHT)
-        nav_frame.place(relx=0.5, rely=0.5, anchor="center")
+        self.search_var.trace("w", self._on_search_typed)
         
-        ttk.Button(nav_frame, text="◀ Previous", style="Flat.TButton", command=self._prev_page).pack(side="left", padx=8)
-        self.page_label = ttk.Label(nav_frame, text="Page 1 of 1", font=("Segoe UI", 10, "bold"))
-        self.page_label.pack(side="left", padx=20)
-        ttk.Button(nav_frame, text="Next ▶", style="Flat.TButton", command=self._next_page).pack(side="left", padx=8)
+        # ── FIXED Footer (always at bottom) ──────────────────
+        footer = tk.Frame(self, bg=styles.LIGHT, height=50)
+        footer.pack(side="bottom", fill="x", pady=10, padx=10)
+        footer.pack_propagate(False)
         
-        self.records_label = tk.Label(pager, text="", font=("Segoe UI", 9), fg="#64748b", bg=styles.LIGHT)
+        # ── Table Area (Matching DrawingRequestsPage) ───────────────────────────
+        self.table = CanvasTable(
+            self,
+            headers=["ID", "Username", "Department", "Permissions", "Actions"],
+            col_widths=[50, 150, 150, 250, 150],
+            min_widths=[40, 100, 100, 150, 120],
+            values=self._row_values,
+            actions=[("Edit", "Action", self._show_edit_user_dialog),
+                     ("Delete", "Danger", self._delete_user)],
+            on_view_change=self._on_view_change,
+            on_sort=self._on_sort)
+        self.table.pack(expand=True, fill="both")
+        
+        self.records_label = tk.Label(footer, text="", font=("Segoe UI", 9), fg="#64748b", bg=styles.LIGHT)
         self.records_label.place(relx=1.0, rely=0.5, anchor="e", x=-10)
 
-    def _sync_columns(self):
-        for i, f in enumerate(self.header_frames):
-            try:
-                self.col_widths[i] = f.winfo_width()
-            except:
-                pass
-        
-        for row_dict in self.row_widgets:
-            # Sync data cells
-            for i, cell in enumerate(row_dict['cells']):
-                try:
-                    cell.config(width=self.col_widths[i])
-                except:
-                    pass
-            # Sync action cell (last column)
-            try:
-                row_dict['action_cell'].config(width=self.col_widths[4])
-            except:
-                pass
+        self.sync_label = tk.Label(footer, text="",
+                                   font=("Segoe UI", 9), fg="#94a3b8", bg=styles.LIGHT)
+        self.sync_label.place(relx=0.0, rely=0.5, anchor="w", x=10)
+
+    def _row_values(self, user):
+        perms = self._format_permissions(user.get('access_tokens', []))
+        dept = user.get('department', '') or ''
+        return [str(user['id']), user['admin_name'], dept, perms]
+
+    def _force_refresh(self):
+        """Refresh button: bypass cached results so edits made elsewhere show up."""
+        import sys
+        import os
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+        from db_handler import db
+        db.invalidate_cache("drawing_users")
+        self.refresh()
 
     def refresh(self):
-        # Fetch data in thread
-        thread = threading.Thread(target=self._fetch_data_thread)
-        thread.daemon = True
-        thread.start()
+        if self._reading_cache:
+            # _on_cache_ready starts the first refresh
+            return
+        # Fetch data on the shared worker pool
+        self._loader.request()
 
-    def _fetch_data_thread(self):
+    @classmethod
+    def _fetch_data(cls):
         try:
             import sys
             import os
@@ -154,142 +187,52 @@ class UsersPage(ttk.Frame):
                     except:
                         tokens = []
                 user['access_tokens'] = tokens
-                
-            self.after(0, lambda: self._on_data_ready(data))
+                cls._set_search_key(user)
+            
+            # fetch_all returns [] on failure; there is always at least the
+            # logged-in user, so an empty list is never worth caching
+            if data:
+                local_cache.save(cls.cache_name, data, "id", exclude=(SEARCH_KEY,))
+            return data
         except Exception as e:
             print("Error fetching users: {}".format(e))
-            self.after(0, lambda: self._on_data_ready([]))
+            return []
 
     def _on_data_ready(self, data):
+        if not data and self.users:
+            # Database unreachable: keep the cached list on screen
+            self.sync_label.config(text="Offline – showing cached data")
+            return
         self.users = data
-        self._search_data() 
-
-    def _search_data(self, *args):
-        q = self.search_var.get().lower().strip()
-        if q in ("", "search users..."):
-            self.filtered = list(self.users)
-        else:
-            self.filtered = [
-                u for u in self.users
-                if q in str(u.get("id", "")).lower() or \
-                   q in str(u.get("admin_name", "")).lower() or \
-                   q in str(u.get("department", "")).lower()
-            ]
-        self.current_page = 0
-        self._load_table()
-
-    def _load_table(self):
-        start = self.current_page * self.page_size
-        end = start + self.page_size
-        page_data = self.filtered[start:end]
-        
-        for i in range(self.page_size):
-            if i < len(page_data):
-                user = page_data[i]
-                bg = "white" if i % 2 == 0 else "#fbfcfd"
-                
-                if i >= len(self.row_widgets):
-                    # Create new row
-                    row_frame = tk.Frame(self.body_frame, bg="white")
-                    row_frame.pack(fill="x")
-                    
-                    cells = []
-                    labels = []
-                    
-                    # Data columns (ID, Username, Department, Permissions)
-                    for j in range(4):
-                        cell = tk.Frame(row_frame, bg="white", width=self.col_widths[j], height=45)
-                        cell.pack_propagate(False)
-                        cell.pack(side="left")
-                        
-                        lbl = tk.Label(cell, font=("Segoe UI", 10), fg="#334155", bg="white")
-                        lbl.pack(expand=True, fill="both", padx=5)
-                        
-                        cells.append(cell)
-                        labels.append(lbl)
-                    
-                    # Action Column
-                    action_cell = tk.Frame(row_frame, bg="white", width=self.col_widths[4], height=45)
-                    action_cell.pack_propagate(False)
-                    action_cell.pack(side="left")
-                    
-                    btn_frame = tk.Frame(action_cell, bg="white")
-                    btn_frame.place(relx=0.5, rely=0.5, anchor="center")
-                    
-                    # We create buttons but don't assign commands yet
-                    edit_btn = ttk.Button(btn_frame, text="Edit", style="Action.TButton")
-                    edit_btn.pack(side="left", padx=2)
-                    
-                    del_btn = ttk.Button(btn_frame, text="Delete", style="Danger.TButton")
-                    del_btn.pack(side="left", padx=2)
-                    
-                    row_dict = {
-                        'frame': row_frame,
-                        'cells': cells,
-                        'labels': labels,
-                        'action_cell': action_cell,
-                        'btn_frame': btn_frame,
-                        'edit_btn': edit_btn,
-                        'del_btn': del_btn
-                    }
-                    self.row_widgets.append(row_dict)
-                    
-                    row_frame.bind("<Enter>", lambda e, r=row_frame: self._on_row_enter(r))
-                    
-                else:
-                    row_dict = self.row_widgets[i]
-                    if not row_dict['frame'].winfo_viewable():
-                        row_dict['frame'].pack(fill="x")
-
-                # Update Row Content
-                row_dict['frame'].configure(bg=bg)
-                row_dict['frame'].bind("<Leave>", lambda e, r=row_dict['frame'], b=bg: self._on_row_leave(r, b))
-                
-                # Values
-                perms = self._format_permissions(user.get('access_tokens', []))
-                dept = user.get('department', '') or ''
-                vals = [str(user['id']), user['admin_name'], dept, perms]
-                
-                for j, (lbl, cell, val) in enumerate(zip(row_dict['labels'], row_dict['cells'], vals)):
-                    lbl.configure(text=val, bg=bg)
-                    cell.configure(bg=bg, width=self.col_widths[j])
-                
-                # Update Action Column Backgrounds
-                row_dict['action_cell'].configure(bg=bg, width=self.col_widths[4])
-                row_dict['btn_frame'].configure(bg=bg)
-                
-                # Commands
-                row_dict['edit_btn'].configure(command=lambda u=user: self._show_edit_user_dialog(u))
-                row_dict['del_btn'].configure(command=lambda u=user: self._delete_user(u))
-
-            elif i < len(self.row_widgets):
-                # Hide unused rows
-                self.row_widgets[i]['frame'].pack_forget()
-
-        self._update_pagination()
-
-    def _on_row_enter(self, row):
-        highlight_bg = "#f1f5f9"
-        row.configure(bg=highlight_bg)
-        for child in row.winfo_children():
-            child.configure(bg=highlight_bg)
-            if isinstance(child, tk.Frame):
-                for gc in child.winfo_children():
-                    try:
-                        gc.configure(bg=highlight_bg)
-                    except:
-                        pass
-
-    def _on_row_leave(self, row, original_bg):
-        row.configure(bg=original_bg)
-        for child in row.winfo_children():
-            child.configure(bg=original_bg)
-            if isinstance(child, tk.Frame):
-                for gc in child.winfo_children():
-                    try:
-                        gc.configure(bg=original_bg)
-                    except:
-                        pass
+        self.sync_label.config(text=format_synced(time.time()))
+        self._search_data(keep_position=True)
+
+    def _on_search_typed(self, *args):
+        q = self.search_var.get()
+        self._search.set_query("" if q == "Search users..." else q)
+
+    @staticmethod
+    def _set_search_key(u):
+        u[SEARCH_KEY] = search_text(u.get("id", ""), u.get("admin_name", ""), u.get("department", ""))
+
+    def _search_data(self, keep_position=False):
+        """Re-indexes freshly loaded users and re-applies the current search."""
+        self._sorter.index = SortIndex(self._sort_keys, self.users)
+        self._search.set_rows(self.users, keep_position=keep_position,
+                              index=TrigramIndex(search_key, self.users))
+
+    def _on_search_results(self, rows, keep_position):
+        self.filtered = rows
+        self.table.set_data(self._sorter.apply(self.filtered), keep_position=keep_position)
+
+    def _on_sort(self, column):
+        self._sorter.toggle(column)
+        self.table.show_sort(self._sorter.column, self._sorter.descending)
+        self.table.set_data(self._sorter.apply(self.filtered))
+
+    def _sort_keys(self, u):
+        # Raw id, so users sort numerically rather than as text
+        return (sort_value(u.get('id')),) + tuple(sort_value(v) for v in self._row_values(u)[1:])
 
     def _format_permissions(self, tokens):
         perm_map = {
@@ -307,25 +250,9 @@ class UsersPage(ttk.Frame):
                 names.append(perm_map[t])
         return ", ".join(names)
 
-    def _update_pagination(self):
-        total = len(self.filtered)
-        pages = max(1, (total + self.page_size - 1) // self.page_size)
-        current = self.current_page + 1
-        self.page_label.config(text="Page {} of {}".format(current, pages))
-        
-        start = self.current_page * self.page_size + 1 if total > 0 else 0
-        end = min((self.current_page + 1) * self.page_size, total)
-        self.records_label.config(text="Showing {}–{} of {} records".format(start, end, total))
-
-    def _prev_page(self):
-        if self.current_page > 0:
-            self.current_page -= 1
-            self._load_table()
-
-    def _next_page(self):
-        if (self.current_page + 1) * self.page_size < len(self.filtered):
-            self.current_page += 1
-            self._load_table()
+    def _on_view_change(self, first, last, total):
+        self.records_label.config(text="Showing {}–{} of {} records".format(
+            first + 1 if total else 0, last + 1 if total else 0, total))
 
     def _clear_placeholder(self, e):
         if self.search_entry.get() == "Search users...":
@@ -466,7 +393,8 @@ class UsersPage(ttk.Frame):
             sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
             from db_handler import db
             
-            chk = db.fetch_all("SELECT id FROM drawing_users WHERE admin_name=%s", (username,))
+            chk = db.fetch_all("SELECT id FROM drawing_users WHERE admin_name=%s", (username,),
+                               use_cache=False)
             if chk:
                 messagebox.showerror("Error", "Username already exists", parent=dlg)
                 return
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from scheduler import scheduler as default_scheduler, TaskScheduler
+
+class DataStore:
+    """
+    In-memory snapshots of page datasets, loaded ahead of the page itself.
+
+    A snapshot has the same shape as LocalCache.load(): (rows, high_water_mark,
+    synced_at). A page takes its snapshot once when it is built; from then on
+    the page owns the data. A prefetch that has started cannot be stopped, so
+    a page built while its prefetch is still in flight waits for that result
+    instead of loading the same data a second time.
+    """
+    def __init__(self, scheduler=None):
+        self.scheduler = scheduler or default_scheduler
+        self._snapshots = {}
+        self._names = set()       # Everything prefetched since the last clear()
+        self._generation = 0      # Bumped by clear(); older results are dropped
+        self._lock = threading.Lock()
+
+    def _key(self, name):
+        return ("prefetch", name)
+
+    def prefetch(self, name, load):
+        """
+        Runs load() on a worker at low priority and keeps its result under name.
+        load returns (rows, high_water_mark), or None when there is nothing
+        worth keeping (the page then loads as usual).
+        """
+        with self._lock:
+            self._names.add(name)
+            generation = self._generation
+        self.scheduler.submit(self._key(name), self._run, (name, load, generation),
+                              priority=TaskScheduler.LOW)
+
+    def _run(self, name, load, generation):
+        result = load()
+        if result is None:
+            return None
+        rows, high_water_mark = result
+        snapshot = (rows, high_water_mark, time.time())
+        with self._lock:
+            if generation != self._generation:
+                return None
+            self._snapshots[name] = snapshot
+        return snapshot
+
+    def _pop(self, name):
+        with self._lock:
+            return self._snapshots.pop(name, None)
+
+    def take(self, name, callback):
+        """
+        Hands the snapshot for name to its page as callback(snapshot), or
+        callback(None) if there is none. While the prefetch for name is still
+        in flight the callback is attached to it and runs on the Tk main
+        thread once it finishes; otherwise it runs at once.
+        """
+        key = self._key(name)
+        with self._lock:
+            snapshot = self._snapshots.pop(name, None)
+            waiting = snapshot is None and name in self._names
+        if waiting and self.scheduler.is_running(key):
+            # Joins the running task; should it finish first, the new task
+            # just picks up what it stored
+            self.scheduler.submit(key, self._pop, (name,),
+                                  callback=lambda result: callback(self._pop(name) or result),
+                                  errback=lambda error: callback(None))
+            return
+        callback(snapshot)
+
+    def clear(self):
+        """Forgets everything, e.g. when another user logs in."""
+        with self._lock:
+            names = self._names
+            self._snapshots = {}
+            self._names = set()
+            self._generation += 1
+        for name in names:
+            self.scheduler.cancel(self._key(name))
+
+# Global instance shared by all pages
+data_store = DataStore()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import re
+import threading
+import time
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is open ended
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+BUCKET_LABELS = (["<={}ms".format(b) for b in LATENCY_BUCKETS_MS] +
+                 [">{}ms".format(LATENCY_BUCKETS_MS[-1])])
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)")
+_WS_RE = re.compile(r"\s+")
+# Statements touching such a column never have their bind params printed
+_SENSITIVE_RE = re.compile(r"pass|pwd|secret", re.IGNORECASE)
+
+def statement_key(query):
+    """
+    Normalizes a statement so calls that differ only in literals group together,
+    e.g. "WHERE id = 5" and "WHERE id = 7" both become "WHERE id = ?".
+    """
+    sql = _WS_RE.sub(" ", query).strip().rstrip(";")
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("(...)", sql)
+    return sql
+
+class _StatementStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms, rows, error):
+        self.calls += 1
+        if error:
+            self.errors += 1
+        self.rows += rows or 0
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.min_ms = elapsed_ms if self.min_ms is None else min(self.min_ms, elapsed_ms)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def percentile(self, pct):
+        """Estimates a latency percentile by interpolating inside its bucket."""
+        if not self.calls:
+            return 0.0
+        target = self.calls * pct / 100.0
+        seen = 0
+        lower = 0.0
+        for i, count in enumerate(self.buckets):
+            upper = LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+            if count and seen + count >= target:
+                fraction = (target - seen) / count
+                value = lower + (upper - lower) * fraction
+                return min(max(value, self.min_ms), self.max_ms)
+            seen += count
+            lower = upper
+        return self.max_ms
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'cache_hits': self.cache_hits,
+            'rows': self.rows,
+            'avg_rows': float(self.rows) / self.calls if self.calls else 0.0,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            'min_ms': round(self.min_ms or 0.0, 3),
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': round(self.percentile(50), 3),
+            'p95_ms': round(self.percentile(95), 3),
+            'p99_ms': round(self.percentile(99), 3),
+            'histogram': dict(zip(BUCKET_LABELS, self.buckets)),
+        }
+
+class QueryStats:
+    """
+    Collects per-statement latency, row-count and error statistics.
+
+    Statements are grouped by their normalized text. Any call slower than
+    slow_query_ms is printed together with its bind parameters, except for
+    statements that mention a password-like column (e.g. admin_pass), whose
+    parameters are shown as <redacted>.
+    """
+    def __init__(self, slow_query_ms=500, log_params=True):
+        self.slow_query_ms = slow_query_ms
+        self.log_params = log_params
+        self.enabled = True
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    def _entry(self, key):
+        entry = self._stats.get(key)
+        if entry is None:
+            entry = self._stats[key] = _StatementStats()
+        return entry
+
+    def record(self, query, params, elapsed, rows=0, error=False):
+        """Records one executed statement; elapsed is in seconds."""
+        if not self.enabled:
+            return
+        elapsed_ms = elapsed * 1000.0
+        key = statement_key(query)
+        with self._lock:
+            self._entry(key).add(elapsed_ms, rows, error)
+
+        if self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms:
+            shown = ""
+            if self.log_params and params:
+                shown = " params=<redacted>" if _SENSITIVE_RE.search(query) \
+                    else " params={!r}".format(params)
+            print("Slow query ({:.1f} ms, {} rows): {}{}".format(elapsed_ms, rows, key, shown))
+
+    def record_cache_hit(self, query):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entry(statement_key(query)).cache_hits += 1
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._started = time.time()
+
+    def snapshot(self):
+        """Returns a JSON-serializable copy of all statistics, slowest first."""
+        with self._lock:
+            statements = [dict(stats.as_dict(), statement=key)
+                          for key, stats in self._stats.items()]
+            started = self._started
+        statements.sort(key=lambda s: s['total_ms'], reverse=True)
+        return {
+            'since': started,
+            'taken_at': time.time(),
+            'slow_query_ms': self.slow_query_ms,
+            'statements': statements,
+        }
+
+    def dump(self, path, extra=None):
+        """Writes the snapshot (plus any extra sections) to a JSON file."""
+        data = self.snapshot()
+        if extra:
+            data.update(extra)
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2, default=str)
+        return path
+
+    def format_report(self, limit=20):
+        """Returns a plain-text table of the most expensive statements."""
+        lines = ["{:>7} {:>5} {:>9} {:>9} {:>9} {:>9}  {}".format(
+            "calls", "errs", "rows", "p50 ms", "p95 ms", "p99 ms", "statement")]
+        for s in self.snapshot()['statements'][:limit]:
+            lines.append("{:>7} {:>5} {:>9} {:>9.1f} {:>9.1f} {:>9.1f}  {}".format(
+                s['calls'], s['errors'], s['rows'],
+                s['p50_ms'], s['p95_ms'], s['p99_ms'], s['statement'][:120]))
+        return "\n".join(lines)
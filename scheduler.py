@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import itertools
+import queue
+import threading
+
+class Task:
+    """A unit of background work submitted to the TaskScheduler."""
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    CANCELLED = "cancelled"
+
+    def __init__(self, key, func, args, kwargs, priority=0, lock=None):
+        self.key = key
+        self.priority = priority
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.state = Task.PENDING
+        self.callbacks = []   # (callback, errback) pairs, run on the Tk thread
+        # The scheduler's lock, so a cancel cannot interleave with a state change
+        self._lock = lock or threading.RLock()
+
+    @property
+    def cancelled(self):
+        return self.state == Task.CANCELLED
+
+    def cancel(self):
+        """Skips the task if it has not started; otherwise drops its result."""
+        with self._lock:
+            if self.state in (Task.PENDING, Task.RUNNING):
+                self.state = Task.CANCELLED
+
+class TaskScheduler:
+    """
+    App-wide background worker pool.
+
+    Work is submitted under a key. While a task with that key is pending or
+    running, submitting the same key again does not start new work; the new
+    callback is simply attached to the task already in flight. Results are
+    handed back through a single queue that the Tk main loop drains, so
+    callbacks always run on the main thread.
+
+    Pending tasks are started in priority order, then in submission order,
+    so LOW work such as prefetching never delays what the user asked for.
+    """
+    HIGH = -1
+    NORMAL = 0
+    LOW = 1
+
+    def __init__(self, workers=4, poll_interval=30):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks = queue.PriorityQueue()   # (priority, sequence, task)
+        self._sequence = itertools.count()
+        self._results = queue.Queue()
+        self._in_flight = {}   # key -> Task
+        # Reentrant: Task.cancel() takes it too and is called with it held
+        self._lock = threading.RLock()
+        self._threads = []
+        self._root = None
+
+    def attach(self, root):
+        """Starts delivering callbacks on root's Tk main loop."""
+        self._root = root
+        root.after(self.poll_interval, self._poll)
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._worker, name="scheduler-{}".format(len(self._threads)))
+            t.daemon = True
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, key, func, args=(), kwargs=None, callback=None, errback=None,
+               priority=NORMAL):
+        """
+        Runs func(*args, **kwargs) on a worker thread.
+
+        Args:
+            key: Identifies the work; identical in-flight keys are deduplicated.
+            callback: Called with the result on the Tk main thread.
+            errback: Called with the exception on the Tk main thread.
+            priority: HIGH, NORMAL or LOW; decides which pending task starts next.
+
+        Returns:
+            Task: The new task, or the in-flight task this call joined.
+        """
+        with self._lock:
+            task = self._in_flight.get(key)
+            if task is None or task.cancelled:
+                task = Task(key, func, tuple(args), kwargs or {}, priority, self._lock)
+                self._in_flight[key] = task
+                self._tasks.put((priority, next(self._sequence), task))
+                self._start_workers()
+            if callback is not None or errback is not None:
+                task.callbacks.append((callback, errback))
+            return task
+
+    def cancel(self, key):
+        """Cancels the in-flight task for key, if any. Returns True if one was found."""
+        with self._lock:
+            task = self._in_flight.pop(key, None)
+            if task is None:
+                return False
+            task.cancel()
+            return True
+
+    def is_running(self, key):
+        with self._lock:
+            return key in self._in_flight
+
+    def _worker(self):
+        while True:
+            _, _, task = self._tasks.get()
+            # Checked and changed under the lock, so a concurrent cancel()
+            # either stops the task here or is seen after it ran
+            with self._lock:
+                if task.cancelled:
+                    continue
+                task.state = Task.RUNNING
+            try:
+                result, error = task.func(*task.args, **task.kwargs), None
+            except Exception as e:
+                result, error = None, e
+            with self._lock:
+                if self._in_flight.get(task.key) is task:
+                    del self._in_flight[task.key]
+                if task.cancelled:
+                    continue
+                task.state = Task.DONE
+                self._results.put((task, result, error))
+
+    def run_pending(self):
+        """Runs callbacks for finished tasks. Must be called on the Tk main thread."""
+        while True:
+            try:
+                task, result, error = self._results.get_nowait()
+            except queue.Empty:
+                return
+            if task.cancelled:
+                continue
+            for callback, errback in list(task.callbacks):
+                try:
+                    if error is None:
+                        if callback is not None:
+                            callback(result)
+                    elif errback is not None:
+                        errback(error)
+                    else:
+                        print("Background task {!r} failed: {}".format(task.key, error))
+                except Exception as e:
+                    # e.g. the page that asked for the data has been destroyed
+                    print("Error in callback for {!r}: {}".format(task.key, e))
+
+    def _poll(self):
+        self.run_pending()
+        try:
+            self._root.after(self.poll_interval, self._poll)
+        except Exception:
+            # Root window destroyed; stop polling
+            pass
+
+class SingleFlight:
+    """
+    Coalesces repeated requests to (re)load one dataset.
+
+    While a load is in flight, further requests do not start new work.
+    Instead exactly one trailing load runs after the current one finishes,
+    using the arguments of the most recent request, so a refresh asked for
+    after a write still sees that write. Results are delivered in request
+    order and an older response never replaces a newer one.
+
+    request() and the callbacks run on the Tk main thread.
+    """
+    def __init__(self, scheduler, key, func, callback, errback=None):
+        self.scheduler = scheduler
+        self.key = (key, id(self))
+        self.func = func
+        self.callback = callback
+        self.errback = errback
+        self.busy = False
+        self._pending = None      # Arguments for the trailing load, if any
+        self._issued = 0          # Generation of the last load started
+        self._delivered = 0       # Generation of the last result handed out
+
+    def request(self, *args):
+        if self.busy:
+            self._pending = args
+            return
+        self._start(args)
+
+    def _start(self, args):
+        self.busy = True
+        self._pending = None
+        self._issued += 1
+        generation = self._issued
+        self.scheduler.submit(self.key, self.func, args,
+                              callback=lambda result: self._done(generation, result, None),
+                              errback=lambda error: self._done(generation, None, error))
+
+    def _done(self, generation, result, error):
+        self.busy = False
+        try:
+            if generation > self._delivered:
+                self._delivered = generation
+                if error is None:
+                    self.callback(result)
+                elif self.errback is not None:
+                    self.errback(error)
+                else:
+                    print("Error loading {!r}: {}".format(self.key[0], error))
+        finally:
+            if self._pending is not None:
+                self._start(self._pending)
+
+# Global instance shared by all pages
+scheduler = TaskScheduler()
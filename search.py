@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+from scheduler import scheduler as default_scheduler
+
+# Joins the fields of a record in its index text; queries never contain it,
+# so no trigram or substring match can span two fields
+FIELD_SEPARATOR = "\x1f"
+
+# Record key holding its precomputed search text. Pages set it when a record
+# is loaded or changed, so filtering is one substring test per record.
+SEARCH_KEY = "_search"
+
+def search_text(*values):
+    """Lowercased text of a record's searchable fields, for SEARCH_KEY."""
+    return FIELD_SEPARATOR.join(str(v if v is not None else "").lower() for v in values)
+
+def search_key(row):
+    return row[SEARCH_KEY]
+
+def matches_key(row, query):
+    """SearchController matches function for records carrying SEARCH_KEY."""
+    return query in row[SEARCH_KEY]
+
+def _trigrams(text):
+    return set(text[i:i + 3] for i in range(len(text) - 2))
+
+class TrigramIndex:
+    """
+    Inverted index from character trigrams to records, for substring search.
+
+    A query of three or more characters is answered by intersecting the
+    posting sets of its trigrams, smallest first, and checking the few
+    candidates left with a plain substring test. Results come back in the
+    order of the dataset the index was built from. Shorter queries, and
+    broad ones whose rarest trigram is in too many records to beat a
+    plain scan, return None and the caller falls back to a scan.
+
+    Records are identified by object identity, so updating a record in
+    place and calling update(record) re-indexes only that record. All
+    methods are thread-safe; building a large index is best done on a
+    worker thread.
+
+    Args:
+        text_of: text_of(record) -> lowercased search text, usually search_key.
+        rows: Initial records, in display order.
+    """
+    def __init__(self, text_of, rows=()):
+        self.text_of = text_of
+        self._postings = {}   # trigram -> set of doc numbers
+        self._texts = {}      # doc -> indexed text
+        self._rows = {}       # doc -> record
+        self._docs = {}       # id(record) -> doc
+        self._order = []      # docs in display order (may hold removed docs)
+        self._rank = {}       # doc -> position in _order
+        self._next_doc = 0
+        self._lock = threading.Lock()
+        self.add_rows(rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _index_doc(self, doc, text):
+        self._texts[doc] = text
+        postings = self._postings
+        for gram in _trigrams(text):
+            p = postings.get(gram)
+            if p is None:
+                postings[gram] = p = set()
+            p.add(doc)
+
+    def _unindex_doc(self, doc):
+        text = self._texts.pop(doc)
+        postings = self._postings
+        for gram in _trigrams(text):
+            p = postings.get(gram)
+            if p is not None:
+                p.discard(doc)
+                if not p:
+                    del postings[gram]
+
+    def _new_doc(self, row):
+        doc = self._next_doc
+        self._next_doc += 1
+        self._docs[id(row)] = doc
+        self._rows[doc] = row
+        self._order.append(doc)
+        self._rank[doc] = len(self._order) - 1
+        return doc
+
+    def add_rows(self, rows):
+        """Appends records at the end of the display order."""
+        text_of = self.text_of
+        with self._lock:
+            for row in rows:
+                if id(row) not in self._docs:
+                    self._index_doc(self._new_doc(row), text_of(row))
+
+    def update(self, row):
+        """Re-indexes one record after it changed in place (or adds it at the end)."""
+        text = self.text_of(row)
+        with self._lock:
+            doc = self._docs.get(id(row))
+            if doc is None:
+                self._index_doc(self._new_doc(row), text)
+                return
+            old = self._texts[doc]
+            if old == text:
+                return
+            old_grams = _trigrams(old)
+            new_grams = _trigrams(text)
+            postings = self._postings
+            for gram in old_grams - new_grams:
+                p = postings.get(gram)
+                if p is not None:
+                    p.discard(doc)
+                    if not p:
+                        del postings[gram]
+            for gram in new_grams - old_grams:
+                p = postings.get(gram)
+                if p is None:
+                    postings[gram] = p = set()
+                p.add(doc)
+            self._texts[doc] = text
+
+    def remove(self, row):
+        with self._lock:
+            doc = self._docs.pop(id(row), None)
+            if doc is not None:
+                self._unindex_doc(doc)
+                del self._rows[doc]
+
+    def reorder(self, rows):
+        """Sets the display order after records were inserted or moved."""
+        with self._lock:
+            docs = self._docs
+            self._order = [docs[id(r)] for r in rows if id(r) in docs]
+            # Rebuilt here, usually on a worker, rather than by the next search
+            self._rank = dict((d, i) for i, d in enumerate(self._order))
+
+    def search(self, query, max_candidates=None):
+        """
+        Records whose text contains query, in display order. None if query
+        is too short, or if its rarest trigram is in more than max_candidates
+        records (by default an eighth of them), where a scan is cheaper.
+        """
+        if len(query) < 3:
+            return None
+        with self._lock:
+            if max_candidates is None:
+                max_candidates = len(self._rows) // 8
+            postings = []
+            for gram in _trigrams(query):
+                p = self._postings.get(gram)
+                if not p:
+                    return []
+                postings.append(p)
+            postings.sort(key=len)
+            if len(postings[0]) > max_candidates:
+                return None
+            candidates = postings[0]
+            for p in postings[1:]:
+                candidates = candidates & p
+                if not candidates:
+                    return []
+
+            if len(query) > 3:
+                # Having all the trigrams does not mean they are adjacent
+                texts = self._texts
+                hits = set(d for d in candidates if query in texts[d])
+            else:
+                hits = candidates
+
+            rows = self._rows
+            if len(hits) * 8 > len(self._order):
+                # Large result: walking the order is cheaper than sorting
+                return [rows[d] for d in self._order if d in hits]
+            return [rows[d] for d in sorted(hits, key=self._rank.__getitem__)]
+
+class Cancelled(Exception):
+    """Raised inside a filter pass that has been superseded by a newer query."""
+
+class SearchController:
+    """
+    Debounced search over an in-memory list of rows.
+
+    Keystrokes only restart a quiet-period timer; the filter runs once typing
+    pauses for delay ms. Small datasets are filtered on the Tk main thread,
+    datasets larger than threshold on the shared TaskScheduler. Every run gets
+    a generation number: a newer query cancels the worker task of an older
+    one, an already running pass notices within check_every rows and stops,
+    and results of a superseded pass are never delivered.
+
+    Args:
+        widget: Any Tk widget, used for after() timers.
+        matches: matches(row, query) -> bool; the query is stripped and lowercased.
+        on_results: on_results(rows, keep_position), called on the main thread.
+        delay: Quiet period in ms before a typed query runs.
+        threshold: Row count above which filtering moves off the main thread.
+        index: Optional TrigramIndex over the rows; queries of three or
+               more characters that leave at most threshold candidates
+               are answered from it on the main thread.
+        history: Number of earlier results kept for refining and backspace.
+
+    When remote is set to remote(query, keep_position), the debounced query
+    is handed to it instead of being filtered locally, e.g. for a page that
+    searches on the database server once its data no longer fits in memory.
+
+    Results are kept on a short stack in which every query contains the one
+    below it. A query that extends the last one only filters that result,
+    and deleting characters pops back to a result already on the stack.
+    """
+    def __init__(self, widget, matches, on_results, delay=200, threshold=5000,
+                 scheduler=None, check_every=2048, index=None, history=16):
+        self.widget = widget
+        self.matches = matches
+        self.on_results = on_results
+        self.delay = delay
+        self.threshold = threshold
+        self.scheduler = scheduler or default_scheduler
+        self.check_every = check_every
+        self.index = index
+        self.remote = None
+        self.history = history
+
+        self.rows = []
+        self.query = ""
+        self._generation = 0
+        self._timer = None
+        self._key = ("search", id(self))
+        self._results = []    # (query, rows), each query containing the previous
+
+    def set_query(self, query):
+        """Called on every keystroke; (re)starts the quiet-period timer."""
+        self.query = query.strip().lower()
+        self._cancel_timer()
+        self._timer = self.widget.after(self.delay, self._on_timer)
+
+    def set_rows(self, rows, keep_position=False, index=None):
+        """
+        New data arrived: re-run the current query on it without waiting.
+        Pass index when it was rebuilt for the new rows; an index updated in
+        place needs no passing.
+        """
+        self.rows = rows
+        if index is not None:
+            self.index = index
+        self.invalidate()
+        self._cancel_timer()
+        self.run(keep_position)
+
+    def invalidate(self):
+        """Forgets earlier results, e.g. after a record's search text changed."""
+        self._results = []
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self.widget.after_cancel(self._timer)
+            self._timer = None
+
+    def _on_timer(self):
+        self._timer = None
+        self.run()
+
+    def run(self, keep_position=False):
+        self._generation += 1
+        generation = self._generation
+        rows, query = self.rows, self.query
+        # Whatever is still running for an older query is now useless
+        self.scheduler.cancel(self._key)
+
+        if self.remote is not None:
+            self.remote(query, keep_position)
+            return
+
+        # Keep only the results of queries this one extends
+        results = self._results
+        while results and results[-1][0] not in query:
+            results.pop()
+        last_rows = None
+        if results:
+            last_query, last_rows = results[-1]
+            if last_query == query:
+                # Backspace onto an earlier query, or the same query again
+                self._deliver(generation, last_rows, keep_position, query)
+                return
+            if self.index is None or len(last_rows) <= self.threshold:
+                rows = last_rows
+
+        if query and rows is self.rows and self.index is not None:
+            # A broad query is passed over by the index and scanned instead,
+            # on a worker when there are more than threshold rows
+            result = self.index.search(query, self.threshold)
+            if result is not None:
+                self._deliver(generation, result, keep_position, query)
+                return
+            if last_rows is not None:
+                rows = last_rows
+
+        if not query or len(rows) <= self.threshold:
+            self._deliver(generation, self._filter(rows, query, generation), keep_position, query)
+            return
+        self.scheduler.submit(self._key, self._filter_async, (rows, query, generation),
+                              callback=lambda result: self._deliver(generation, result,
+                                                                    keep_position, query))
+
+    def _filter(self, rows, query, generation):
+        if not query:
+            return list(rows)
+        matches = self.matches
+        result = []
+        check_every = self.check_every
+        for i, row in enumerate(rows):
+            if i % check_every == 0 and generation != self._generation:
+                raise Cancelled()
+            if matches(row, query):
+                result.append(row)
+        return result
+
+    def _filter_async(self, rows, query, generation):
+        try:
+            return self._filter(rows, query, generation)
+        except Cancelled:
+            return None
+
+    def _deliver(self, generation, result, keep_position, query):
+        if result is None or generation != self._generation:
+            return
+        results = self._results
+        if not results or results[-1][0] != query:
+            results.append((query, result))
+            if len(results) > self.history:
+                del results[0]
+        self.on_results(result, keep_position)
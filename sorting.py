@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import bisect
+import numbers
+import threading
+
+def sort_value(value):
+    """Sort key for one cell: numbers before text, text case-insensitive, None as ""."""
+    if isinstance(value, numbers.Number) and not isinstance(value, bool):
+        return (0, value, "")
+    return (1, 0, str(value if value is not None else "").lower())
+
+class SortIndex:
+    """
+    Per-column sort orders of a set of records, for click-to-sort tables.
+
+    Every column keeps its records as a sorted list of (key, doc) pairs,
+    built once with a plain tuple sort. Putting any subset of the records
+    (e.g. the current search result) in column order is then a walk over
+    that list, or for a small subset a sort of integer positions, so no
+    records are compared or re-keyed per click. Records are identified by
+    object identity; update(record) after an in-place change moves it in
+    the columns whose key changed, at the cost of a list insert.
+
+    Args:
+        keys_of: keys_of(record) -> tuple of sort keys, one per column,
+                 usually built with sort_value.
+        rows: Initial records; ties keep this order.
+    """
+    def __init__(self, keys_of, rows=()):
+        self.keys_of = keys_of
+        self._docs = {}       # id(record) -> doc
+        self._rows = {}       # doc -> record
+        self._keys = {}       # doc -> keys tuple
+        self._columns = None  # per column: sorted list of (key, doc)
+        self._rank = {}       # column -> {doc: position}, built when needed
+        self._next_doc = 0
+        self._lock = threading.Lock()
+
+        pending = []
+        for row in rows:
+            if id(row) not in self._docs:
+                pending.append((self._new_doc(row), keys_of(row)))
+        with self._lock:
+            self._columns = [sorted((keys[c], doc) for doc, keys in pending)
+                             for c in range(len(pending[0][1]))] if pending else None
+            for doc, keys in pending:
+                self._keys[doc] = keys
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _new_doc(self, row):
+        doc = self._next_doc
+        self._next_doc += 1
+        self._docs[id(row)] = doc
+        self._rows[doc] = row
+        return doc
+
+    def _insert(self, doc, keys):
+        if self._columns is None:
+            self._columns = [[] for _ in keys]
+        self._keys[doc] = keys
+        for c, column in enumerate(self._columns):
+            bisect.insort(column, (keys[c], doc))
+            self._rank.pop(c, None)
+
+    def add_rows(self, rows):
+        """Adds records; each one costs a list insert per column."""
+        keys_of = self.keys_of
+        with self._lock:
+            for row in rows:
+                if id(row) not in self._docs:
+                    self._insert(self._new_doc(row), keys_of(row))
+
+    def update(self, row):
+        """Re-sorts one record after it changed in place (or adds it)."""
+        keys = self.keys_of(row)
+        with self._lock:
+            doc = self._docs.get(id(row))
+            if doc is None:
+                self._insert(self._new_doc(row), keys)
+                return
+            old = self._keys[doc]
+            if old == keys:
+                return
+            for c, column in enumerate(self._columns):
+                if old[c] != keys[c]:
+                    del column[bisect.bisect_left(column, (old[c], doc))]
+                    bisect.insort(column, (keys[c], doc))
+                    self._rank.pop(c, None)
+            self._keys[doc] = keys
+
+    def remove(self, row):
+        with self._lock:
+            doc = self._docs.pop(id(row), None)
+            if doc is None:
+                return
+            del self._rows[doc]
+            keys = self._keys.pop(doc)
+            for c, column in enumerate(self._columns):
+                del column[bisect.bisect_left(column, (keys[c], doc))]
+            self._rank = {}
+
+    def order(self, rows, column, descending=False):
+        """
+        rows (any subset of the indexed records) in the order of column.
+        Records the index does not know keep their order at the end.
+        """
+        with self._lock:
+            docs = self._docs
+            if self._columns is None:
+                return list(rows)
+            sorted_docs = self._columns[column]
+            wanted = set()
+            unknown = []
+            for row in rows:
+                doc = docs.get(id(row))
+                if doc is None:
+                    unknown.append(row)
+                else:
+                    wanted.add(doc)
+
+            records = self._rows
+            if len(wanted) * 8 > len(sorted_docs):
+                # Large subset: walking the column is cheaper than sorting
+                pairs = reversed(sorted_docs) if descending else sorted_docs
+                result = [records[d] for _, d in pairs if d in wanted]
+            else:
+                rank = self._rank.get(column)
+                if rank is None:
+                    rank = self._rank[column] = dict((d, i) for i, (_, d) in enumerate(sorted_docs))
+                result = [records[d] for d in sorted(wanted, key=rank.__getitem__,
+                                                     reverse=descending)]
+            return result + unknown
+
+class TableSorter:
+    """
+    Sort state of a table page: which column, and in which direction.
+
+    Clicking a column sorts it ascending, clicking it again descending and a
+    third time restores the original order. apply(rows) puts a filtered list
+    in the current order using the page's SortIndex.
+    """
+    def __init__(self):
+        self.index = None
+        self.column = None
+        self.descending = False
+
+    def toggle(self, column):
+        if column != self.column:
+            self.column, self.descending = column, False
+        elif not self.descending:
+            self.descending = True
+        else:
+            self.column, self.descending = None, False
+
+    def apply(self, rows):
+        if self.column is None or self.index is None:
+            return rows
+        return self.index.order(rows, self.column, self.descending)